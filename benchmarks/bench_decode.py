@@ -0,0 +1,63 @@
+"""
+Benchmark: request body decoding cost per reading
+Compares the previous ingestion path (json.loads into dicts plus a
+required-key check) with the msgspec decoder used by POST /data.
+
+Usage:
+    python benchmarks/bench_decode.py
+"""
+
+import json
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from schemas import decode_readings
+
+REQUIRED_FIELDS = ['client_id', 'avg_blink_rate', 'avg_temp', 'left_eye_redness', 'right_eye_redness']
+
+READING = {
+    "client_id": 1,
+    "avg_blink_rate": 15,
+    "avg_temp": 36,
+    "left_eye_redness": 5,
+    "right_eye_redness": 4
+}
+
+
+def dict_path(body):
+    """Previous path: parse into dicts, then check keys (no type checking)"""
+    data = json.loads(body)
+    readings = data if isinstance(data, list) else [data]
+    for reading in readings:
+        for field in REQUIRED_FIELDS:
+            if field not in reading:
+                raise ValueError(f"Missing required field: {field}")
+    return readings
+
+
+def msgspec_path(body):
+    """Current path: decode and type-check into structs in one pass"""
+    return decode_readings(body)
+
+
+def per_reading_us(fn, body, readings):
+    number = max(1, 20000 // readings)
+    best = min(timeit.repeat(lambda: fn(body), number=number, repeat=5))
+    return best / number / readings * 1e6
+
+
+def main():
+    print(f"{'batch':>8} {'dict path (us/reading)':>24} {'msgspec (us/reading)':>22} {'speedup':>8}")
+    for size in (1, 10, 100, 1000):
+        payload = READING if size == 1 else [READING] * size
+        body = json.dumps(payload).encode()
+        old = per_reading_us(dict_path, body, size)
+        new = per_reading_us(msgspec_path, body, size)
+        print(f"{size:>8} {old:>24.3f} {new:>22.3f} {old / new:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,93 @@
+"""
+Benchmark: population statistics materialization cost
+Compares a per-row Python baseline (group readings by day, then sort each
+day's values for percentiles) with the vectorized PopulationAccumulator
+used by the background job, over chunks of data rows.
+
+Usage:
+    python benchmarks/bench_population.py
+"""
+
+import os
+import random
+import statistics
+import sys
+import time
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from population_stats import PopulationAccumulator, PopulationStats, day_number
+from schemas import READING_METRICS
+
+CHUNK = 5000
+PERCENTILES = (5, 25, 50, 75, 95)
+
+
+def make_rows(count, days=30, seed=1):
+    rng = random.Random(seed)
+    now = datetime.now(timezone.utc)
+    return [{
+        'id': i + 1,
+        'created_at': (now - timedelta(seconds=rng.uniform(0, days * 86400))).isoformat(),
+        'avg_blink_rate': rng.randint(8, 25),
+        'avg_temp': rng.randint(34, 38),
+        'left_eye_redness': rng.randint(0, 10),
+        'right_eye_redness': rng.randint(0, 10)
+    } for i in range(count)]
+
+
+def python_path(rows):
+    """Baseline: per-row grouping, then sorted-list statistics per day and metric"""
+    days = {}
+    for row in rows:
+        day = days.setdefault(day_number(row['created_at']), {metric: [] for metric in READING_METRICS})
+        for metric in READING_METRICS:
+            if row[metric] is not None:
+                day[metric].append(row[metric])
+
+    result = {}
+    for day, metrics in days.items():
+        result[day] = {}
+        for metric, values in metrics.items():
+            values.sort()
+            result[day][metric] = {
+                'mean': statistics.fmean(values),
+                'std': statistics.pstdev(values),
+                'percentiles': statistics.quantiles(values, n=100, method='inclusive'),
+                'histogram': Counter(values)
+            }
+    return result
+
+
+def vectorized_path(rows):
+    """Current path: chunked counts with numpy, summaries from the counts"""
+    accumulator = PopulationAccumulator()
+    for start in range(0, len(rows), CHUNK):
+        accumulator.add_rows(rows[start:start + CHUNK])
+    stats = PopulationStats(percentiles=PERCENTILES)
+    stats.publish(accumulator, datetime.now(timezone.utc))
+    return stats
+
+
+def best_of(fn, rows, repeat=3):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn(rows)
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def main():
+    print(f"{'rows':>8} {'python (ms)':>12} {'vectorized (ms)':>16} {'speedup':>8}")
+    for count in (10000, 50000, 200000):
+        rows = make_rows(count)
+        old = best_of(python_path, rows) * 1000
+        new = best_of(vectorized_path, rows) * 1000
+        print(f"{count:>8} {old:>12.1f} {new:>16.1f} {old / new:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
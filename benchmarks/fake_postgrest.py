@@ -0,0 +1,428 @@
+"""
+Fake PostgREST backend for offline benchmarks
+Serves the subset of the Supabase REST API that app.py uses (filters,
+ordering, limits, insert/update/delete with returned rows) from memory,
+with configurable injected latency and error rates.
+
+It also mimics the database side of the schema: primary key conflicts,
+updated_at on update, data_tombstones on delete and the users -> data
+foreign key cascade. With --assign-ids, data.id is allocated by the fake
+like an identity column and client-supplied ids are ignored.
+
+Run standalone and point the app at it:
+    python benchmarks/fake_postgrest.py --port 54321 --latency-ms 20 --seed-users 10
+    SUPABASE_URL=http://127.0.0.1:54321 python app.py
+"""
+
+import argparse
+import heapq
+import json
+import random
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qsl
+
+# Query parameters that are not column filters
+RESERVED_PARAMS = {'select', 'order', 'limit', 'offset', 'columns', 'on_conflict'}
+
+PRIMARY_KEYS = {'users': 'user_id', 'data': 'id'}
+
+# Tables whose primary key --assign-ids allocates from a sequence
+IDENTITY_TABLES = ('data',)
+
+# Users seeded for delete scenarios start at this id
+VICTIM_USER_ID_START = 100001
+
+# Columns with an equality index, so filtered reads don't scan whole tables
+INDEXED_COLUMNS = {'users': ('user_id', 'email'), 'data': ('id', 'client_id'), 'data_tombstones': ('client_id',)}
+
+
+def now_iso():
+    return datetime.now(timezone.utc).isoformat()
+
+
+@lru_cache(maxsize=65536)
+def parse_timestamp(text):
+    ts = datetime.fromisoformat(text)
+    if ts.tzinfo is None:
+        ts = ts.replace(tzinfo=timezone.utc)
+    return ts
+
+
+def _sort_key(value):
+    if isinstance(value, str):
+        try:
+            return parse_timestamp(value)
+        except ValueError:
+            return value
+    return value
+
+
+def _coerce(row_value, text):
+    """Convert a filter operand to the type of the column value it is compared with"""
+    if isinstance(row_value, bool):
+        return text == 'true'
+    if isinstance(row_value, (int, float)):
+        return float(text)
+    if isinstance(row_value, str):
+        try:
+            parse_timestamp(row_value)
+            return parse_timestamp(text)
+        except ValueError:
+            return text
+    return text
+
+
+def _matches(row, column, expression):
+    op, _, operand = expression.partition('.')
+    value = row.get(column)
+
+    if op == 'is':
+        return value is None if operand == 'null' else value is not None
+    if value is None:
+        return False
+    if op == 'in':
+        options = operand.strip('()').split(',')
+        return any(_sort_key(value) == _coerce(value, option) for option in options)
+
+    left, right = _sort_key(value), _coerce(value, operand)
+    if op == 'eq':
+        return left == right
+    if op == 'neq':
+        return left != right
+    if op == 'gt':
+        return left > right
+    if op == 'gte':
+        return left >= right
+    if op == 'lt':
+        return left < right
+    if op == 'lte':
+        return left <= right
+    raise ValueError(f'Unsupported filter operator: {op}')
+
+
+class Conflict(Exception):
+    """Primary key violation"""
+
+
+class FakeDatabase:
+    """
+    In-memory tables with the behaviour of the app's Supabase schema
+    - assign_ids: allocate IDENTITY_TABLES ids on insert instead of using
+      the ids sent by the client
+    """
+
+    def __init__(self, assign_ids=False):
+        self.assign_ids = assign_ids
+        self._sequences = {}
+        self.tables = {'users': [], 'data': [], 'data_tombstones': []}
+        self.indexes = {
+            table: {column: {} for column in columns} for table, columns in INDEXED_COLUMNS.items()
+        }
+        self._lock = threading.Lock()
+
+    def _add(self, table, rows):
+        self.tables[table].extend(rows)
+        for column, index in self.indexes[table].items():
+            for row in rows:
+                index.setdefault(row.get(column), []).append(row)
+
+    def _remove(self, table, rows):
+        removed = {id(row) for row in rows}
+        self.tables[table] = [row for row in self.tables[table] if id(row) not in removed]
+        for column, index in self.indexes[table].items():
+            for key in {row.get(column) for row in rows}:
+                remaining = [row for row in index.get(key, []) if id(row) not in removed]
+                if remaining:
+                    index[key] = remaining
+                else:
+                    index.pop(key, None)
+
+    def seed(self, users, readings_per_user, history=timedelta(days=7), first_user_id=1):
+        """Create users (user<id>@example.com / password) with readings spread over history"""
+        now = datetime.now(timezone.utc)
+        with self._lock:
+            next_id = max(self.indexes['data']['id'], default=0) + 1
+            for user_id in range(first_user_id, first_user_id + users):
+                self._add('users', [{
+                    'user_id': user_id,
+                    'email': f'user{user_id}@example.com',
+                    'password': 'password'
+                }])
+                readings = []
+                for i in range(readings_per_user):
+                    created = (now - history * (i + 1) / readings_per_user).isoformat()
+                    readings.append({
+                        'id': next_id,
+                        'client_id': user_id,
+                        'avg_blink_rate': random.randint(8, 25),
+                        'avg_temp': random.randint(34, 38),
+                        'left_eye_redness': random.randint(0, 10),
+                        'right_eye_redness': random.randint(0, 10),
+                        'created_at': created,
+                        'updated_at': created
+                    })
+                    next_id += 1
+                self._add('data', readings)
+
+    def _filter(self, table, filters):
+        candidates = self.tables[table]
+        for column, expression in filters:
+            index = self.indexes[table].get(column)
+            if index is not None and expression.startswith('eq.'):
+                operand = expression[3:]
+                candidates = index.get(int(operand) if operand.lstrip('-').isdigit() else operand, [])
+                break
+        return [row for row in candidates if all(_matches(row, c, e) for c, e in filters)]
+
+    def select(self, table, filters, order=None, limit=None, offset=0, columns='*'):
+        with self._lock:
+            rows = [dict(row) for row in self._filter(table, filters)]
+
+        terms = order.split(',') if order else []
+        if len(terms) == 1 and limit is not None:
+            # Top-k without sorting everything (e.g. max id lookups)
+            column, _, direction = terms[0].partition('.')
+            pick = heapq.nlargest if direction.startswith('desc') else heapq.nsmallest
+            rows = pick(offset + limit, rows, key=lambda row: (row.get(column) is None, _sort_key(row.get(column))))
+        else:
+            for term in reversed(terms):
+                column, _, direction = term.partition('.')
+                desc = direction.startswith('desc')
+                rows.sort(key=lambda row: (row.get(column) is None, _sort_key(row.get(column))), reverse=desc)
+
+        rows = rows[offset:]
+        if limit is not None:
+            rows = rows[:limit]
+        if columns != '*':
+            keep = [column.strip() for column in columns.split(',')]
+            rows = [{column: row.get(column) for column in keep} for row in rows]
+        return rows
+
+    def insert(self, table, rows):
+        key = PRIMARY_KEYS.get(table)
+        with self._lock:
+            existing = self.indexes[table][key] if key else {}
+            created = []
+            for row in rows:
+                row = dict(row)
+                if self.assign_ids and table in IDENTITY_TABLES:
+                    if table not in self._sequences:
+                        self._sequences[table] = max(existing, default=0)
+                    self._sequences[table] += 1
+                    row[key] = self._sequences[table]
+                if key and (row.get(key) in existing or any(r[key] == row.get(key) for r in created)):
+                    raise Conflict(f'duplicate key value violates unique constraint "{table}_pkey"')
+                if table == 'data':
+                    # Both default to now(); created_at may be backdated by the client
+                    row.setdefault('updated_at', now_iso())
+                    row.setdefault('created_at', row['updated_at'])
+                created.append(row)
+            self._add(table, created)
+        return [dict(row) for row in created]
+
+    def update(self, table, filters, values):
+        with self._lock:
+            rows = self._filter(table, filters)
+            reindex = bool(set(values) & set(self.indexes[table]))
+            if reindex:
+                self._remove(table, rows)
+            for row in rows:
+                row.update(values)
+                if table == 'data':
+                    row['updated_at'] = now_iso()
+            if reindex:
+                self._add(table, rows)
+            return [dict(row) for row in rows]
+
+    def delete(self, table, filters):
+        with self._lock:
+            rows = self._filter(table, filters)
+            self._remove(table, rows)
+
+            if table == 'users':
+                # ON DELETE CASCADE from data.client_id
+                cascaded = [r for row in rows for r in self.indexes['data']['client_id'].get(row['user_id'], [])]
+                self._remove('data', cascaded)
+                self._tombstone(cascaded)
+            elif table == 'data':
+                self._tombstone(rows)
+            return [dict(row) for row in rows]
+
+    def _tombstone(self, rows):
+        deleted_at = now_iso()
+        self._add('data_tombstones', [
+            {'id': row['id'], 'client_id': row['client_id'], 'created_at': row['created_at'], 'deleted_at': deleted_at}
+            for row in rows
+        ])
+
+
+class FakePostgREST:
+    """
+    HTTP server answering /rest/v1/<table> like PostgREST
+    - latency, jitter: seconds added to every request (uniform jitter)
+    - tail_rate, tail_latency: fraction of requests that get extra latency
+    - error_rate: fraction of requests answered with a gateway 503
+    """
+
+    def __init__(self, latency=0.0, jitter=0.0, tail_rate=0.0, tail_latency=0.0,
+                 error_rate=0.0, host='127.0.0.1', port=0, seed=None):
+        self.latency = latency
+        self.jitter = jitter
+        self.tail_rate = tail_rate
+        self.tail_latency = tail_latency
+        self.error_rate = error_rate
+        self.db = FakeDatabase()
+        self.requests = 0
+        self.injected_errors = 0
+        self._random = random.Random(seed)
+        self._random_lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._handler())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, name='fake-postgrest', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _draw(self):
+        """Pick (delay, fail) for one request"""
+        with self._random_lock:
+            self.requests += 1
+            delay = self.latency + self._random.uniform(0, self.jitter)
+            if self._random.random() < self.tail_rate:
+                delay += self.tail_latency
+            fail = self._random.random() < self.error_rate
+            if fail:
+                self.injected_errors += 1
+        return delay, fail
+
+    def _handler(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, format, *args):
+                pass
+
+            def _send(self, status, body, content_type='application/json'):
+                payload = body if isinstance(body, bytes) else json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(payload)))
+                if status < 300 and isinstance(body, list):
+                    self.send_header('Content-Range', f'0-{max(len(body) - 1, 0)}/*')
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def _handle(self):
+                length = int(self.headers.get('Content-Length') or 0)
+                raw = self.rfile.read(length) if length else b''
+
+                delay, fail = fake._draw()
+                if delay:
+                    time.sleep(delay)
+                if fail:
+                    self._send(503, b'<html><body>503 Service Unavailable</body></html>', 'text/html')
+                    return
+
+                url = urlsplit(self.path)
+                if not url.path.startswith('/rest/v1/'):
+                    self._send(404, {'message': f'Unknown path {url.path}', 'code': 'PGRST000'})
+                    return
+                table = url.path[len('/rest/v1/'):]
+                if table not in fake.db.tables:
+                    self._send(404, {'message': f'relation "{table}" does not exist', 'code': '42P01'})
+                    return
+
+                params = parse_qsl(url.query, keep_blank_values=True)
+                options = {key: value for key, value in params if key in RESERVED_PARAMS}
+                filters = [(key, value) for key, value in params if key not in RESERVED_PARAMS]
+
+                try:
+                    if self.command in ('GET', 'HEAD'):
+                        rows = fake.db.select(
+                            table,
+                            filters,
+                            order=options.get('order'),
+                            limit=int(options['limit']) if 'limit' in options else None,
+                            offset=int(options.get('offset', 0)),
+                            columns=options.get('select', '*')
+                        )
+                        self._send(200, rows)
+                    elif self.command == 'POST':
+                        body = json.loads(raw or b'[]')
+                        rows = fake.db.insert(table, body if isinstance(body, list) else [body])
+                        self._send(201, rows)
+                    elif self.command == 'PATCH':
+                        self._send(200, fake.db.update(table, filters, json.loads(raw or b'{}')))
+                    elif self.command == 'DELETE':
+                        self._send(200, fake.db.delete(table, filters))
+                    else:
+                        self._send(405, {'message': f'Unsupported method {self.command}', 'code': 'PGRST000'})
+                except Conflict as e:
+                    self._send(409, {'message': str(e), 'code': '23505', 'hint': None, 'details': None})
+                except (ValueError, KeyError) as e:
+                    self._send(400, {'message': str(e), 'code': 'PGRST100', 'hint': None, 'details': None})
+
+            do_GET = do_HEAD = do_POST = do_PATCH = do_DELETE = _handle
+
+        return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Fake PostgREST backend with injected latency and errors')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=54321)
+    parser.add_argument('--latency-ms', type=float, default=0.0)
+    parser.add_argument('--jitter-ms', type=float, default=0.0)
+    parser.add_argument('--tail-rate', type=float, default=0.0)
+    parser.add_argument('--tail-ms', type=float, default=0.0)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--seed-users', type=int, default=0)
+    parser.add_argument('--readings-per-user', type=int, default=100)
+    parser.add_argument('--victim-users', type=int, default=0, help='extra users (ids from 100001) for delete scenarios')
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--assign-ids', action='store_true', help='allocate data ids like an identity column')
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    fake = FakePostgREST(
+        latency=args.latency_ms / 1000,
+        jitter=args.jitter_ms / 1000,
+        tail_rate=args.tail_rate,
+        tail_latency=args.tail_ms / 1000,
+        error_rate=args.error_rate,
+        host=args.host,
+        port=args.port,
+        seed=args.seed
+    )
+    fake.db.assign_ids = args.assign_ids
+    fake.db.seed(args.seed_users, args.readings_per_user)
+    fake.db.seed(args.victim_users, 20, first_user_id=VICTIM_USER_ID_START)
+
+    print(f'Fake PostgREST listening on {fake.url}', flush=True)
+    try:
+        fake._server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        fake._server.server_close()
+
+
+if __name__ == '__main__':
+    main()
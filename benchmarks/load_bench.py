@@ -0,0 +1,513 @@
+"""
+Offline load benchmark for every endpoint in app.py
+Starts the fake PostgREST backend and the app as separate processes,
+drives a weighted mix of requests at a fixed concurrency, and reports
+throughput and p50/p95/p99 latency overall and per scenario.
+
+The run fails (exit code 1) when results regress past the stored
+baselines in benchmarks/baselines.json for the chosen profile.
+
+Usage:
+    python benchmarks/load_bench.py                      # default profile, check baselines
+    python benchmarks/load_bench.py --profile degraded   # injected errors and slow tail
+    python benchmarks/load_bench.py --update-baselines   # record new baselines
+    python benchmarks/load_bench.py --latency-ms 50      # ad-hoc run (baseline check skipped)
+"""
+
+import argparse
+import gzip
+import json
+import math
+import os
+import random
+import socket
+import subprocess
+import sys
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+
+import httpx
+import zstandard
+
+from fake_postgrest import VICTIM_USER_ID_START
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_ROOT = os.path.dirname(BENCH_DIR)
+BASELINES_PATH = os.path.join(BENCH_DIR, 'baselines.json')
+
+ADMIN_TOKEN = 'bench-admin-token'
+
+# Backend and load settings per profile
+PROFILES = {
+    'default': {
+        'latency_ms': 20.0,
+        'jitter_ms': 10.0,
+        'tail_rate': 0.0,
+        'tail_ms': 0.0,
+        'error_rate': 0.0,
+        'requests': 3000,
+        'concurrency': 16,
+        'users': 50,
+        'readings_per_user': 200,
+        'victim_users': 200,
+        'max_insert_error_rate': 0.01
+    },
+    'degraded': {
+        'latency_ms': 20.0,
+        'jitter_ms': 10.0,
+        'tail_rate': 0.05,
+        'tail_ms': 400.0,
+        'error_rate': 0.03,
+        'requests': 3000,
+        'concurrency': 16,
+        'users': 50,
+        'readings_per_user': 200,
+        'victim_users': 200,
+        'max_insert_error_rate': 0.10
+    }
+}
+
+# A result regresses when it is worse than baseline by more than these margins.
+# Per-scenario latency is only checked at p50/p95 for scenarios with enough
+# samples; tail percentiles of small samples are too noisy to gate on.
+THROUGHPUT_TOLERANCE = 0.30
+OVERALL_LATENCY_TOLERANCE = 0.30
+SCENARIO_LATENCY_TOLERANCE = 0.50
+LATENCY_SLACK_MS = 5.0
+MIN_SCENARIO_SAMPLES = 100
+ERROR_RATE_SLACK = 0.03
+ERROR_RATE_TOLERANCE = 0.25
+
+# insert_data allocates ids with max(id)+1, which collides on the primary key
+# under concurrency. The fake backend runs with --assign-ids (an identity
+# column), so concurrent inserts measure ingestion under contention rather
+# than the conflict path. Their error rate is held to the profile's
+# max_insert_error_rate instead of a relative margin.
+INSERT_PREFIX = 'insert_'
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def wait_until_ready(url, timeout=30.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            httpx.get(url, timeout=1.0)
+            return
+        except httpx.HTTPError:
+            time.sleep(0.1)
+    raise RuntimeError(f'{url} did not become ready within {timeout}s')
+
+
+def start_backend(config, seed):
+    port = free_port()
+    process = subprocess.Popen([
+        sys.executable, os.path.join(BENCH_DIR, 'fake_postgrest.py'),
+        '--port', str(port),
+        '--latency-ms', str(config['latency_ms']),
+        '--jitter-ms', str(config['jitter_ms']),
+        '--tail-rate', str(config['tail_rate']),
+        '--tail-ms', str(config['tail_ms']),
+        '--error-rate', str(config['error_rate']),
+        '--seed-users', str(config['users']),
+        '--readings-per-user', str(config['readings_per_user']),
+        '--victim-users', str(config['victim_users']),
+        '--seed', str(seed),
+        '--assign-ids'
+    ], stdout=subprocess.DEVNULL)
+    url = f'http://127.0.0.1:{port}'
+    wait_until_ready(f'{url}/rest/v1/users?limit=1')
+    return process, url
+
+
+def start_app(backend_url):
+    port = free_port()
+    env = dict(
+        os.environ,
+        SUPABASE_URL=backend_url,
+        ADMIN_TOKEN=ADMIN_TOKEN,
+        PROFILE_SAMPLE_RATE='0',
+        USER_DELETE_THROTTLE='0.01'
+    )
+    process = subprocess.Popen([
+        sys.executable, '-m', 'flask', '--app', 'app', 'run',
+        '--host', '127.0.0.1', '--port', str(port), '--with-threads', '--no-reload', '--no-debugger'
+    ], cwd=REPO_ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    url = f'http://127.0.0.1:{port}'
+    wait_until_ready(f'{url}/health')
+    return process, url
+
+
+class Scenarios:
+    """
+    Weighted request mix covering every endpoint
+    Each scenario returns (method, path, request kwargs, expected statuses).
+    State shared between scenarios (job ids, profile ids, victims) is kept
+    here so that follow-up endpoints have something real to hit.
+    """
+
+    def __init__(self, config):
+        self.users = config['users']
+        self.max_data_id = config['users'] * config['readings_per_user']
+        self.victims = list(range(VICTIM_USER_ID_START, VICTIM_USER_ID_START + config['victim_users']))
+        self.job_ids = []
+        self.profile_ids = []
+        self.lock = threading.Lock()
+        self.admin = {'X-Admin-Token': ADMIN_TOKEN}
+        self.weights = {
+            'health': 2,
+            'health_supabase': 1,
+            'health_hot_window': 1,
+            'login': 4,
+            'insert_single': 8,
+            'insert_batch': 2,
+            'insert_gzip': 1,
+            'insert_delta_batch': 1,
+            'get_data_day': 20,
+            'get_data_week': 8,
+            'get_data_month': 3,
+            'get_data_all': 2,
+            'get_data_custom': 2,
+            'get_data_since': 6,
+            'population_stats': 3,
+            'population_stats_refresh': 1,
+            'get_user': 4,
+            'update_user': 2,
+            'delete_user': 1,
+            'get_job': 2,
+            'get_data_record': 6,
+            'update_data_record': 3,
+            'delete_data_record': 2,
+            'profiled_request': 1,
+            'admin_profiles': 1,
+            'admin_profile_download': 1,
+            'admin_slow_queries': 1,
+            'not_found': 1
+        }
+
+    def reading(self, rng):
+        return {
+            'client_id': rng.randint(1, self.users),
+            'avg_blink_rate': rng.randint(8, 25),
+            'avg_temp': rng.randint(34, 38),
+            'left_eye_redness': rng.randint(0, 10),
+            'right_eye_redness': rng.randint(0, 10)
+        }
+
+    def delta_batch(self, rng, count):
+        """One client's last count seconds of readings, delta-encoded"""
+        readings = [self.reading(rng) for _ in range(count)]
+        batch = {
+            'client_id': rng.randint(1, self.users),
+            'base_timestamp': (datetime.now(timezone.utc) - timedelta(seconds=count)).isoformat(),
+            'time_deltas_ms': [0] + [1000] * (count - 1)
+        }
+        for metric in ('avg_blink_rate', 'avg_temp', 'left_eye_redness', 'right_eye_redness'):
+            values = [reading[metric] for reading in readings]
+            batch[metric] = values[:1] + [b - a for a, b in zip(values, values[1:])]
+        return batch
+
+    def build(self, name, rng):
+        client_id = rng.randint(1, self.users)
+        data_id = rng.randint(1, self.max_data_id)
+
+        if name == 'health':
+            return 'GET', '/health', {}, {200}
+        if name == 'health_supabase':
+            return 'GET', '/health/supabase', {}, {200}
+        if name == 'health_hot_window':
+            return 'GET', '/health/hot-window', {}, {200}
+        if name == 'login':
+            body = {'email': f'user{client_id}@example.com', 'password': 'password'}
+            return 'POST', '/login', {'json': body}, {200}
+        if name == 'insert_single':
+            return 'POST', '/data', {'json': self.reading(rng)}, {201}
+        if name == 'insert_batch':
+            return 'POST', '/data', {'json': [self.reading(rng) for _ in range(20)]}, {201}
+        if name == 'insert_gzip':
+            body = gzip.compress(json.dumps([self.reading(rng) for _ in range(20)]).encode())
+            headers = {'Content-Type': 'application/json', 'Content-Encoding': 'gzip'}
+            return 'POST', '/data', {'content': body, 'headers': headers}, {201}
+        if name == 'insert_delta_batch':
+            body = zstandard.ZstdCompressor().compress(json.dumps(self.delta_batch(rng, 60)).encode())
+            headers = {'Content-Type': 'application/vnd.visioncare.delta+json', 'Content-Encoding': 'zstd'}
+            return 'POST', '/data', {'content': body, 'headers': headers}, {201}
+        if name in ('get_data_day', 'get_data_week', 'get_data_month', 'get_data_all'):
+            return 'GET', f'/data/{client_id}', {'params': {'range': name.rsplit('_', 1)[1]}}, {200}
+        if name == 'get_data_custom':
+            end = datetime.now(timezone.utc).date()
+            params = {'start_date': (end - timedelta(days=3)).isoformat(), 'end_date': end.isoformat()}
+            return 'GET', f'/data/{client_id}', {'params': params}, {200}
+        if name == 'get_data_since':
+            since = datetime.now(timezone.utc) - timedelta(minutes=rng.randint(1, 120))
+            return 'GET', f'/data/{client_id}', {'params': {'since': since.strftime('%Y-%m-%dT%H:%M:%S.%fZ')}}, {200}
+        if name == 'population_stats':
+            # 503 until the first materialization after startup has finished
+            return 'GET', '/stats/population', {'params': {'metric': rng.choice(('avg_blink_rate', 'avg_temp'))}}, {200, 503}
+        if name == 'population_stats_refresh':
+            return 'POST', '/stats/population/refresh', {'headers': self.admin}, {202}
+        if name == 'get_user':
+            return 'GET', f'/users/{client_id}', {}, {200}
+        if name == 'update_user':
+            return 'PUT', f'/users/{client_id}', {'json': {'password': 'password'}}, {200}
+        if name == 'delete_user':
+            with self.lock:
+                user_id = self.victims.pop() if self.victims else VICTIM_USER_ID_START - 1
+            return 'DELETE', f'/users/{user_id}', {}, {202, 404}
+        if name == 'get_job':
+            with self.lock:
+                job_id = rng.choice(self.job_ids) if self.job_ids else 'unknown'
+            return 'GET', f'/jobs/{job_id}', {}, {200, 404}
+        if name == 'get_data_record':
+            return 'GET', f'/data/record/{data_id}', {}, {200, 404}
+        if name == 'update_data_record':
+            return 'PUT', f'/data/record/{data_id}', {'json': {'avg_temp': rng.randint(34, 38)}}, {200, 404}
+        if name == 'delete_data_record':
+            return 'DELETE', f'/data/record/{data_id}', {}, {200, 404}
+        if name == 'profiled_request':
+            headers = dict(self.admin, **{'X-Profile': '1'})
+            return 'GET', f'/data/{client_id}', {'params': {'range': 'week'}, 'headers': headers}, {200}
+        if name == 'admin_profiles':
+            return 'GET', '/admin/profiles', {'headers': self.admin}, {200}
+        if name == 'admin_profile_download':
+            with self.lock:
+                profile_id = rng.choice(self.profile_ids) if self.profile_ids else 'unknown'
+            return 'GET', f'/admin/profiles/{profile_id}', {'headers': self.admin}, {200, 404}
+        if name == 'admin_slow_queries':
+            return 'GET', '/admin/slow-queries', {'headers': self.admin}, {200}
+        if name == 'not_found':
+            return 'GET', '/nonexistent', {}, {404}
+        raise ValueError(f'Unknown scenario {name}')
+
+    def observe(self, name, response):
+        """Collect ids from responses for follow-up scenarios"""
+        if name == 'delete_user' and response.status_code == 202:
+            with self.lock:
+                self.job_ids.append(response.json()['job_id'])
+        elif name == 'profiled_request' and 'X-Profile-Id' in response.headers:
+            with self.lock:
+                self.profile_ids.append(response.headers['X-Profile-Id'])
+
+
+def percentile(sorted_values, p):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(p / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def summarize(latencies, errors, count):
+    latencies = sorted(latencies)
+    return {
+        'requests': count,
+        'error_rate': round(errors / count, 4) if count else 0.0,
+        'p50_ms': round(percentile(latencies, 50) * 1000, 2),
+        'p95_ms': round(percentile(latencies, 95) * 1000, 2),
+        'p99_ms': round(percentile(latencies, 99) * 1000, 2)
+    }
+
+
+def run_load(app_url, scenarios, total, concurrency, seed):
+    rng = random.Random(seed)
+    names = list(scenarios.weights)
+    plan = rng.choices(names, weights=[scenarios.weights[n] for n in names], k=total)
+    local = threading.local()
+    results = []
+    results_lock = threading.Lock()
+
+    def worker(index, name):
+        if not hasattr(local, 'client'):
+            local.client = httpx.Client(base_url=app_url, timeout=30.0)
+        request_rng = random.Random(seed * 1000003 + index)
+        method, path, kwargs, expected = scenarios.build(name, request_rng)
+        started = time.perf_counter()
+        try:
+            response = local.client.request(method, path, **kwargs)
+            status = response.status_code
+        except httpx.HTTPError:
+            response, status = None, None
+        elapsed = time.perf_counter() - started
+        if response is not None:
+            scenarios.observe(name, response)
+        with results_lock:
+            results.append((name, elapsed, status, status in expected))
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for index, name in enumerate(plan):
+            pool.submit(worker, index, name)
+    wall = time.perf_counter() - started
+
+    per_scenario = defaultdict(list)
+    per_scenario_errors = defaultdict(int)
+    statuses = defaultdict(lambda: defaultdict(int))
+    per_scenario_requests = defaultdict(int)
+    for name, elapsed, status, ok in results:
+        # Scenario latency covers successful responses only, so a scenario
+        # failing fast can't look like a faster one
+        per_scenario_requests[name] += 1
+        statuses[name][str(status)] += 1
+        if ok:
+            per_scenario[name].append(elapsed)
+        else:
+            per_scenario_errors[name] += 1
+
+    overall = summarize([r[1] for r in results], sum(per_scenario_errors.values()), len(results))
+    overall['throughput_rps'] = round(len(results) / wall, 2)
+    overall['wall_s'] = round(wall, 2)
+    report = {
+        'overall': overall,
+        'scenarios': {
+            name: dict(
+                summarize(per_scenario[name], per_scenario_errors[name], per_scenario_requests[name]),
+                statuses=dict(statuses[name])
+            )
+            for name in sorted(per_scenario_requests)
+        }
+    }
+    return report
+
+
+def print_report(report):
+    print(f"\n{'scenario':<24} {'n':>6} {'err%':>6} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}  statuses")
+    for name, stats in report['scenarios'].items():
+        statuses = ' '.join(f'{k}:{v}' for k, v in sorted(stats['statuses'].items()))
+        print(f"{name:<24} {stats['requests']:>6} {stats['error_rate'] * 100:>5.1f}% "
+              f"{stats['p50_ms']:>9.2f} {stats['p95_ms']:>9.2f} {stats['p99_ms']:>9.2f}  {statuses}")
+    overall = report['overall']
+    print(f"\n{'overall':<24} {overall['requests']:>6} {overall['error_rate'] * 100:>5.1f}% "
+          f"{overall['p50_ms']:>9.2f} {overall['p95_ms']:>9.2f} {overall['p99_ms']:>9.2f}")
+    print(f"throughput: {overall['throughput_rps']} req/s over {overall['wall_s']}s")
+
+
+def check_inserts(report, config):
+    """Return insert scenarios whose error rate exceeds the profile's absolute bound"""
+    limit = config['max_insert_error_rate']
+    return [
+        f"{name} error_rate {stats['error_rate']} > {limit}"
+        for name, stats in report['scenarios'].items()
+        if name.startswith(INSERT_PREFIX) and stats['error_rate'] > limit
+    ]
+
+
+def compare(report, baseline):
+    """Return a list of regressions against a baseline entry"""
+    failures = check_inserts(report, baseline['config'])
+
+    def check(label, current, base, keys, tolerance, relative_errors=True):
+        for key in keys:
+            limit = base[key] * (1 + tolerance) + LATENCY_SLACK_MS
+            if current[key] > limit:
+                failures.append(f'{label} {key} {current[key]} > {limit:.2f} (baseline {base[key]})')
+        if not relative_errors:
+            return
+        limit = base['error_rate'] + max(ERROR_RATE_SLACK, base['error_rate'] * ERROR_RATE_TOLERANCE)
+        if current['error_rate'] > limit:
+            failures.append(f"{label} error_rate {current['error_rate']} > {limit:.4f} (baseline {base['error_rate']})")
+
+    overall, base = report['overall'], baseline['overall']
+    floor = base['throughput_rps'] * (1 - THROUGHPUT_TOLERANCE)
+    if overall['throughput_rps'] < floor:
+        failures.append(f"throughput {overall['throughput_rps']} < {floor:.2f} (baseline {base['throughput_rps']})")
+    check('overall', overall, base, ('p50_ms', 'p95_ms', 'p99_ms'), OVERALL_LATENCY_TOLERANCE)
+
+    for name, stats in report['scenarios'].items():
+        if name in baseline['scenarios']:
+            keys = ('p50_ms', 'p95_ms') if stats['requests'] >= MIN_SCENARIO_SAMPLES else ()
+            # Insert error rates are held to the absolute bound in check_inserts
+            check(name, stats, baseline['scenarios'][name], keys, SCENARIO_LATENCY_TOLERANCE,
+                  relative_errors=not name.startswith(INSERT_PREFIX))
+    return failures
+
+
+def load_baselines():
+    if not os.path.exists(BASELINES_PATH):
+        return {}
+    with open(BASELINES_PATH) as f:
+        return json.load(f)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Offline load benchmark against a fake PostgREST backend')
+    parser.add_argument('--profile', choices=sorted(PROFILES), default='default')
+    parser.add_argument('--requests', type=int)
+    parser.add_argument('--concurrency', type=int)
+    parser.add_argument('--latency-ms', type=float)
+    parser.add_argument('--jitter-ms', type=float)
+    parser.add_argument('--tail-rate', type=float)
+    parser.add_argument('--tail-ms', type=float)
+    parser.add_argument('--error-rate', type=float)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--update-baselines', action='store_true', help='store this run as the profile baseline')
+    parser.add_argument('--json', help='also write the report to this file')
+    args = parser.parse_args()
+
+    config = dict(PROFILES[args.profile])
+    for key in config:
+        value = getattr(args, key, None)
+        if value is not None:
+            config[key] = value
+
+    print(f'profile {args.profile}: {json.dumps(config)}')
+    backend, backend_url = start_backend(config, args.seed)
+    app_process = None
+    try:
+        app_process, app_url = start_app(backend_url)
+        report = run_load(app_url, Scenarios(config), config['requests'], config['concurrency'], args.seed)
+    finally:
+        for process in (app_process, backend):
+            if process is not None:
+                process.terminate()
+                process.wait()
+
+    report['profile'] = args.profile
+    report['config'] = config
+    print_report(report)
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2)
+
+    baselines = load_baselines()
+    if args.update_baselines:
+        failures = check_inserts(report, config)
+        if failures:
+            print('\nnot recording a baseline with failing inserts:')
+            for failure in failures:
+                print(f'  {failure}')
+            return 1
+        baselines[args.profile] = {k: report[k] for k in ('config', 'overall', 'scenarios')}
+        with open(BASELINES_PATH, 'w') as f:
+            json.dump(baselines, f, indent=2, sort_keys=True)
+            f.write('\n')
+        print(f'\nbaseline for {args.profile} written to {BASELINES_PATH}')
+        return 0
+
+    baseline = baselines.get(args.profile)
+    if baseline is None:
+        print(f'\nno baseline for {args.profile}; run with --update-baselines to record one')
+        return 0
+    if baseline['config'] != config:
+        print('\nconfig differs from the stored baseline; comparison skipped')
+        return 0
+
+    failures = compare(report, baseline)
+    if failures:
+        print('\nREGRESSIONS:')
+        for failure in failures:
+            print(f'  {failure}')
+        return 1
+    print('\nwithin baseline')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,108 @@
+"""
+Request body decompression for uploads
+Supports Content-Encoding gzip and zstd with a cap on the decompressed
+size, so a small compressed body can't expand into an unbounded one.
+"""
+
+import zlib
+
+import zstandard
+
+SUPPORTED_ENCODINGS = ('identity', 'gzip', 'zstd')
+
+# Decompressed bytes read from the zstd stream per step
+READ_CHUNK = 64 * 1024
+
+
+class PayloadTooLarge(ValueError):
+    """Raised when a body (compressed or decompressed) exceeds the size cap"""
+
+
+class UnsupportedEncoding(ValueError):
+    """Raised for a Content-Encoding the server does not accept"""
+
+
+class CorruptPayload(ValueError):
+    """Raised when a compressed body cannot be decompressed"""
+
+
+def decode_body(body, content_encoding, limit):
+    """
+    Return the decompressed request body
+    - content_encoding: the Content-Encoding header value (None for identity)
+    - limit: maximum size in bytes of the decompressed body
+    """
+    encoding = (content_encoding or 'identity').strip().lower()
+
+    if encoding == 'identity':
+        if len(body) > limit:
+            raise PayloadTooLarge(f'Body exceeds {limit} bytes')
+        return body
+
+    if encoding in ('gzip', 'x-gzip'):
+        return _decode_gzip(body, limit)
+
+    if encoding == 'zstd':
+        return _decode_zstd(body, limit)
+
+    raise UnsupportedEncoding(
+        f"Unsupported Content-Encoding '{content_encoding}'. Use {', '.join(SUPPORTED_ENCODINGS)}"
+    )
+
+
+def _decode_gzip(body, limit):
+    """Decompress a (possibly multi-member) gzip body, capped at limit bytes"""
+    chunks = []
+    size = 0
+    pending = body
+    try:
+        while pending:
+            decompressor = zlib.decompressobj(wbits=zlib.MAX_WBITS | 16)
+            data = decompressor.decompress(pending, limit - size + 1)
+            size += len(data)
+            if size > limit or decompressor.unconsumed_tail:
+                raise PayloadTooLarge(f'Decompressed body exceeds {limit} bytes')
+            if not decompressor.eof:
+                raise CorruptPayload('Invalid gzip body: truncated stream')
+            chunks.append(data)
+            # Bytes after a member start the next one; anything else fails its header check
+            pending = decompressor.unused_data
+    except zlib.error as e:
+        raise CorruptPayload(f'Invalid gzip body: {e}') from e
+    return b''.join(chunks)
+
+
+def _decode_zstd(body, limit):
+    """
+    Decompress a (possibly multi-frame) zstd body without ever holding more
+    than limit + READ_CHUNK decompressed bytes
+    """
+    if not body:
+        return body
+    try:
+        declared = zstandard.frame_content_size(body)
+    except zstandard.ZstdError as e:
+        raise CorruptPayload(f'Invalid zstd body: {e}') from e
+    if declared > limit:
+        raise PayloadTooLarge(f'Decompressed body exceeds {limit} bytes')
+
+    chunks = []
+    size = 0
+    try:
+        with zstandard.ZstdDecompressor().stream_reader(body, read_across_frames=True) as reader:
+            while True:
+                chunk = reader.read(READ_CHUNK)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if size > limit:
+                    raise PayloadTooLarge(f'Decompressed body exceeds {limit} bytes')
+                chunks.append(chunk)
+    except zstandard.ZstdError as e:
+        raise CorruptPayload(f'Invalid zstd body: {e}') from e
+
+    # The reader stops quietly at the end of a truncated stream; the first
+    # frame's declared size (set by one-shot compressors) catches that
+    if size < declared:
+        raise CorruptPayload('Invalid zstd body: truncated stream')
+    return b''.join(chunks)
@@ -0,0 +1,297 @@
+"""
+In-memory hot window of recent readings
+Keeps each active client's most recent readings (default: last 24 hours)
+in a fixed-capacity ring buffer backed by typed arrays, so range=day reads
+can be served without a Supabase round trip.
+
+The window for a client is warmed from the database on first access and
+then kept current by the write handlers in this process. A client is
+dropped (and re-warmed on next access) whenever the buffer can no longer
+prove it holds the complete window.
+"""
+
+import sys
+import threading
+import time
+from array import array
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+
+# Integer columns stored per reading, one array each
+COLUMNS = ('id', 'created_at', 'updated_at', 'avg_blink_rate', 'avg_temp', 'left_eye_redness', 'right_eye_redness')
+
+# Timestamp columns, stored as microseconds since the epoch
+TIMESTAMPS = ('created_at', 'updated_at')
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+def to_micros(value):
+    """Convert a Supabase timestamptz string to integer microseconds since the epoch"""
+    ts = datetime.fromisoformat(value)
+    if ts.tzinfo is None:
+        ts = ts.replace(tzinfo=timezone.utc)
+    return (ts - _EPOCH) // timedelta(microseconds=1)
+
+
+def from_micros(micros):
+    return (_EPOCH + timedelta(microseconds=micros)).isoformat()
+
+
+class ClientWindow:
+    """
+    Ring buffer of one client's readings, oldest insertion at head
+    Arrays start small and double up to capacity, so quiet clients stay cheap.
+    """
+
+    INITIAL_SLOTS = 64
+
+    def __init__(self, client_id, capacity, synced_at=None):
+        self.client_id = client_id
+        self.capacity = capacity
+        self.allocated = min(capacity, self.INITIAL_SLOTS)
+        self.columns = {name: array('q', bytes(8 * self.allocated)) for name in COLUMNS}
+        self.head = 0
+        self.size = 0
+        self.warmed_at = time.monotonic()
+        # Start of the database read the window was warmed from (UTC)
+        self.synced_at = synced_at or datetime.now(timezone.utc)
+
+    def _slot(self, index):
+        return (self.head + index) % self.allocated
+
+    def _grow(self):
+        allocated = min(self.capacity, self.allocated * 2)
+        slots = [self._slot(i) for i in range(self.size)]
+        for name, column in self.columns.items():
+            grown = array('q', bytes(8 * allocated))
+            for i, slot in enumerate(slots):
+                grown[i] = column[slot]
+            self.columns[name] = grown
+        self.allocated = allocated
+        self.head = 0
+
+    def _write(self, slot, row):
+        # Raises TypeError for NULL metrics, which the window can't represent
+        for name in COLUMNS:
+            if name == 'updated_at':
+                # Rows written before updated_at existed were never modified
+                value = row.get('updated_at') or row['created_at']
+            else:
+                value = row[name]
+            self.columns[name][slot] = to_micros(value) if name in TIMESTAMPS else value
+
+    def _read(self, slot):
+        row = {name: self.columns[name][slot] for name in COLUMNS}
+        for name in TIMESTAMPS:
+            row[name] = from_micros(row[name])
+        row['client_id'] = self.client_id
+        return row
+
+    def prune(self, cutoff):
+        """Drop readings older than cutoff (micros) from the head"""
+        created = self.columns['created_at']
+        while self.size and created[self.head] < cutoff:
+            self.head = (self.head + 1) % self.allocated
+            self.size -= 1
+
+    def append(self, row, cutoff):
+        """Append a reading; returns False if a reading inside the window had to be evicted"""
+        self.prune(cutoff)
+        if to_micros(row['created_at']) < cutoff:
+            # Backdated upload that is already outside the window
+            return True
+        complete = True
+        if self.size == self.allocated and self.allocated < self.capacity:
+            self._grow()
+        elif self.size == self.capacity:
+            # Everything older than cutoff is already pruned, so this evicts
+            # a reading that is still inside the window
+            complete = False
+            self.head = (self.head + 1) % self.allocated
+            self.size -= 1
+        self._write(self._slot(self.size), row)
+        self.size += 1
+        return complete
+
+    def find(self, row_id):
+        ids = self.columns['id']
+        for index in range(self.size):
+            if ids[self._slot(index)] == row_id:
+                return index
+        return -1
+
+    def update(self, row):
+        index = self.find(row['id'])
+        if index >= 0:
+            self._write(self._slot(index), row)
+
+    def remove(self, row_id):
+        """Remove a reading, shifting later readings back to keep the ring contiguous"""
+        index = self.find(row_id)
+        if index < 0:
+            return
+        for i in range(index, self.size - 1):
+            src, dst = self._slot(i + 1), self._slot(i)
+            for column in self.columns.values():
+                column[dst] = column[src]
+        self.size -= 1
+
+    def rows_since(self, cutoff):
+        """Readings created at or after cutoff, newest first"""
+        created = self.columns['created_at']
+        slots = [self._slot(i) for i in range(self.size)]
+        slots = [slot for slot in slots if created[slot] >= cutoff]
+        slots.sort(key=lambda slot: created[slot], reverse=True)
+        return [self._read(slot) for slot in slots]
+
+    def nbytes(self):
+        return sum(column.itemsize * len(column) for column in self.columns.values())
+
+
+class HotWindow:
+    """
+    Per-client hot windows with LRU eviction of inactive clients
+    - window: seconds of history each client window covers
+    - capacity: readings per client; a client with more readings in the
+      window than this is served from the database instead
+    - resync: seconds after which a window is re-warmed from the database,
+      bounding staleness from writers in other processes
+    """
+
+    def __init__(self, window=86400, capacity=2048, max_clients=1000, resync=300):
+        self.window = window
+        self.capacity = capacity
+        self.max_clients = max_clients
+        self.resync = resync
+        self._clients = OrderedDict()
+        self._versions = {}
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'misses': 0, 'warms': 0, 'warm_races': 0, 'overflows': 0, 'evictions': 0}
+
+    def cutoff(self):
+        """Start of the window as an aware UTC datetime"""
+        return datetime.now(timezone.utc) - timedelta(seconds=self.window)
+
+    def _cutoff_micros(self):
+        return (self.cutoff() - _EPOCH) // timedelta(microseconds=1)
+
+    def _bump(self, client_id):
+        self._versions[client_id] = self._versions.get(client_id, 0) + 1
+
+    def _drop(self, client_id):
+        if self._clients.pop(client_id, None) is not None:
+            self._stats['evictions'] += 1
+
+    def version(self, client_id):
+        """Write counter for a client; pass to load() to detect concurrent writes"""
+        with self._lock:
+            return self._versions.get(client_id, 0)
+
+    def get(self, client_id):
+        """
+        (rows in the window newest first, synced_at) or None if the client is
+        not warm. synced_at is when the window last read the database; later
+        writes are only reflected if they went through this process.
+        """
+        with self._lock:
+            client = self._clients.get(client_id)
+            if client is not None and time.monotonic() - client.warmed_at > self.resync:
+                self._drop(client_id)
+                client = None
+            if client is None:
+                self._stats['misses'] += 1
+                return None
+            self._clients.move_to_end(client_id)
+            self._stats['hits'] += 1
+            return client.rows_since(self._cutoff_micros()), client.synced_at
+
+    def load(self, client_id, rows, version, synced_at=None):
+        """
+        Warm a client from rows fetched from the database (created_at >= cutoff())
+        synced_at is when that read started (defaults to now).
+        Skipped if the client was written to since version was read, or if
+        the rows don't fit. Returns True if the client is now warm.
+        """
+        with self._lock:
+            if self._versions.get(client_id, 0) != version:
+                self._stats['warm_races'] += 1
+                return False
+            if len(rows) > self.capacity:
+                self._stats['overflows'] += 1
+                return False
+
+            client = ClientWindow(client_id, self.capacity, synced_at)
+            cutoff = self._cutoff_micros()
+            try:
+                for row in sorted(rows, key=lambda r: to_micros(r['created_at'])):
+                    client.append(row, cutoff)
+            except (KeyError, TypeError, ValueError):
+                return False
+
+            self._clients[client_id] = client
+            self._clients.move_to_end(client_id)
+            self._stats['warms'] += 1
+            while len(self._clients) > self.max_clients:
+                self._clients.popitem(last=False)
+                self._stats['evictions'] += 1
+            return True
+
+    def record_insert(self, rows):
+        """Feed rows returned by an insert"""
+        with self._lock:
+            cutoff = self._cutoff_micros()
+            for row in rows:
+                client_id = row['client_id']
+                self._bump(client_id)
+                client = self._clients.get(client_id)
+                if client is None:
+                    continue
+                try:
+                    if not client.append(row, cutoff):
+                        self._stats['overflows'] += 1
+                        self._drop(client_id)
+                except (KeyError, TypeError, ValueError):
+                    self._drop(client_id)
+
+    def record_update(self, row):
+        """Feed a row returned by an update"""
+        with self._lock:
+            client_id = row['client_id']
+            self._bump(client_id)
+            client = self._clients.get(client_id)
+            if client is None:
+                return
+            try:
+                client.update(row)
+            except (KeyError, TypeError, ValueError):
+                self._drop(client_id)
+
+    def record_delete(self, client_id, row_id):
+        with self._lock:
+            self._bump(client_id)
+            client = self._clients.get(client_id)
+            if client is not None:
+                client.remove(row_id)
+
+    def evict(self, client_id):
+        """Forget a client entirely (e.g. after bulk deletes)"""
+        with self._lock:
+            self._bump(client_id)
+            self._drop(client_id)
+
+    def stats(self):
+        """Counters and memory footprint"""
+        with self._lock:
+            stats = dict(self._stats)
+            clients = list(self._clients.values())
+            stats['clients'] = len(clients)
+            stats['readings'] = sum(client.size for client in clients)
+            stats['array_bytes'] = sum(client.nbytes() for client in clients)
+            stats['overhead_bytes'] = sys.getsizeof(self._clients) + sys.getsizeof(self._versions) + sum(
+                sys.getsizeof(client) + sys.getsizeof(client.columns) for client in clients
+            )
+        stats['capacity_per_client'] = self.capacity
+        stats['max_clients'] = self.max_clients
+        stats['window_seconds'] = self.window
+        return stats
@@ -0,0 +1,124 @@
+"""
+In-process background jobs
+Runs long operations (such as chunked deletes) on a small worker pool so
+they are not tied to the lifetime of a single HTTP request, and keeps
+their status around for polling. Periodic jobs are submitted by a
+scheduler thread.
+"""
+
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+
+class Job:
+    """Status record for one background job"""
+
+    PENDING = 'pending'
+    RUNNING = 'running'
+    COMPLETED = 'completed'
+    FAILED = 'failed'
+
+    def __init__(self, kind, key=None, **params):
+        self.job_id = uuid.uuid4().hex
+        self.kind = kind
+        self.key = key
+        self.params = params
+        self.status = self.PENDING
+        self.progress = {}
+        self.error = None
+        self.created_at = datetime.now(timezone.utc)
+        self.started_at = None
+        self.finished_at = None
+        self._lock = threading.Lock()
+
+    @property
+    def finished(self):
+        return self.status in (self.COMPLETED, self.FAILED)
+
+    def update(self, **progress):
+        """Merge progress counters reported by the running job"""
+        with self._lock:
+            self.progress.update(progress)
+
+    def to_dict(self):
+        with self._lock:
+            return {
+                'job_id': self.job_id,
+                'kind': self.kind,
+                'params': self.params,
+                'status': self.status,
+                'progress': dict(self.progress),
+                'error': self.error,
+                'created_at': self.created_at.isoformat(),
+                'started_at': self.started_at.isoformat() if self.started_at else None,
+                'finished_at': self.finished_at.isoformat() if self.finished_at else None
+            }
+
+
+class JobManager:
+    """
+    Schedules jobs on a worker pool and tracks their status
+    - at most one unfinished job per key (resubmitting returns the existing job)
+    - only the most recent keep_finished finished jobs are retained
+    """
+
+    def __init__(self, max_workers=2, keep_finished=200):
+        self.keep_finished = keep_finished
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='job')
+        self._jobs = OrderedDict()
+        self._active_keys = {}
+        self._lock = threading.Lock()
+
+    def submit(self, kind, fn, key=None, **params):
+        """Schedule fn(job) and return (job, created)"""
+        with self._lock:
+            if key is not None and key in self._active_keys:
+                return self._jobs[self._active_keys[key]], False
+
+            job = Job(kind, key=key, **params)
+            self._jobs[job.job_id] = job
+            if key is not None:
+                self._active_keys[key] = job.job_id
+            self._prune()
+
+        self._pool.submit(self._run, job, fn)
+        return job, True
+
+    def schedule(self, kind, fn, interval, key=None, **params):
+        """Submit fn(job) now and then every interval seconds from a daemon thread"""
+        def loop():
+            while True:
+                self.submit(kind, fn, key=key, **params)
+                time.sleep(interval)
+
+        thread = threading.Thread(target=loop, name=f'schedule-{kind}', daemon=True)
+        thread.start()
+        return thread
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def _run(self, job, fn):
+        job.status = Job.RUNNING
+        job.started_at = datetime.now(timezone.utc)
+        try:
+            fn(job)
+            job.status = Job.COMPLETED
+        except Exception as e:
+            job.error = str(e)
+            job.status = Job.FAILED
+        finally:
+            job.finished_at = datetime.now(timezone.utc)
+            with self._lock:
+                if job.key is not None and self._active_keys.get(job.key) == job.job_id:
+                    del self._active_keys[job.key]
+
+    def _prune(self):
+        finished = [job_id for job_id, job in self._jobs.items() if job.finished]
+        for job_id in finished[:max(0, len(finished) - self.keep_finished)]:
+            del self._jobs[job_id]
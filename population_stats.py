@@ -0,0 +1,248 @@
+"""
+Materialized population baselines
+Per-day statistics (mean, standard deviation, percentiles and a histogram)
+for each reading metric across all clients. They are computed in the
+background from the data table and served from memory.
+
+Metrics are integers, so each day keeps an exact count per distinct value.
+Means, percentiles and histograms are derived from those counts, which
+makes percentiles exact and lets any single day be rebuilt on its own.
+"""
+
+import threading
+from datetime import date, datetime, timezone
+
+import numpy as np
+
+from schemas import READING_METRICS
+
+_EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+
+def day_number(value):
+    """UTC day of a Supabase timestamptz string, as days since the epoch"""
+    ts = datetime.fromisoformat(value)
+    if ts.tzinfo is not None:
+        ts = ts.astimezone(timezone.utc)
+    return ts.toordinal() - _EPOCH_ORDINAL
+
+
+def day_numbers(values):
+    """day_number for many timestamps; UTC strings are parsed in one numpy call"""
+    prefixes = [value[:10] for value in values if value.endswith(('+00:00', 'Z'))]
+    if len(prefixes) < len(values):
+        return np.fromiter((day_number(value) for value in values), dtype=np.int64, count=len(values))
+    return np.array(prefixes, dtype='datetime64[D]').astype(np.int64)
+
+
+def day_from_number(number):
+    return date.fromordinal(number + _EPOCH_ORDINAL)
+
+
+class ValueCounts:
+    """Sorted distinct integer values with the number of times each occurred"""
+
+    def __init__(self):
+        self.values = np.zeros(0, dtype=np.int64)
+        self.counts = np.zeros(0, dtype=np.int64)
+
+    def add(self, values, counts):
+        merged, inverse = np.unique(np.concatenate([self.values, values]), return_inverse=True)
+        weights = np.concatenate([self.counts, counts])
+        self.counts = np.bincount(inverse, weights=weights, minlength=len(merged)).astype(np.int64)
+        self.values = merged
+
+    def summary(self, percentiles, histogram_bins):
+        """Count, mean, std, min, max, percentiles and histogram, or None if empty"""
+        if not len(self.values):
+            return None
+        values = self.values.astype(np.float64)
+        counts = self.counts
+        lo, hi = int(self.values[0]), int(self.values[-1])
+
+        n = int(counts.sum())
+        mean = float(np.dot(values, counts) / n)
+        std = float(np.sqrt(np.dot((values - mean) ** 2, counts) / n))
+
+        # Same definition as np.percentile's default (linear), read off the
+        # cumulative counts instead of a sorted copy of every reading
+        cumulative = np.cumsum(counts)
+        positions = np.asarray(percentiles, dtype=np.float64) / 100 * (n - 1)
+        below = values[np.searchsorted(cumulative, np.floor(positions), side='right')]
+        above = values[np.searchsorted(cumulative, np.ceil(positions), side='right')]
+        points = below + (above - below) * (positions - np.floor(positions))
+
+        # Bins of equal integer width covering [min, max]
+        width = -(-(hi - lo + 1) // histogram_bins)
+        edges = np.arange(lo, hi + width + 1, width)
+        histogram, _ = np.histogram(self.values, bins=edges, weights=counts)
+        return {
+            'count': n,
+            'mean': round(mean, 4),
+            'std': round(std, 4),
+            'min': lo,
+            'max': hi,
+            'percentiles': {f'p{q:g}': round(float(p), 4) for q, p in zip(percentiles, points)},
+            'histogram': {
+                'bin_edges': [int(edge) for edge in edges],
+                'counts': [int(c) for c in histogram]
+            }
+        }
+
+
+class PopulationAccumulator:
+    """Per-day value counts built up from chunks of data rows"""
+
+    def __init__(self):
+        self.days = {}
+        self.readings = {}
+        self.rows = 0
+
+    def add_rows(self, rows):
+        """Count one chunk of rows (dicts with created_at and the metric columns)"""
+        if not rows:
+            return
+        self.rows += len(rows)
+        days = day_numbers([row['created_at'] for row in rows])
+        for day, count in zip(*np.unique(days, return_counts=True)):
+            self.readings[int(day)] = self.readings.get(int(day), 0) + int(count)
+            self.days.setdefault(int(day), {})
+
+        # NULL metrics become NaN and are left out of that metric's counts
+        table = np.array([[row[metric] for metric in READING_METRICS] for row in rows], dtype=np.float64)
+        for column, metric in enumerate(READING_METRICS):
+            raw = table[:, column]
+            valid = ~np.isnan(raw)
+            if not valid.any():
+                continue
+            metric_days = days[valid]
+            values = raw[valid].astype(np.int64)
+
+            # Count distinct (day, value) pairs with a 1-D unique over a
+            # combined key, sorted by day, then split per day
+            first_day, first_value = int(metric_days.min()), int(values.min())
+            span = int(values.max()) - first_value + 1
+            if (int(metric_days.max()) - first_day + 1) * span >= 2 ** 62:
+                pairs = np.column_stack([metric_days, values])
+                distinct, counts = np.unique(pairs, axis=0, return_counts=True)
+                pair_days, pair_values = distinct[:, 0], distinct[:, 1]
+            else:
+                keys, counts = np.unique((metric_days - first_day) * span + (values - first_value), return_counts=True)
+                pair_days, pair_values = keys // span + first_day, keys % span + first_value
+
+            splits = np.flatnonzero(np.diff(pair_days)) + 1
+            for day_values, day_counts, start in zip(
+                np.split(pair_values, splits), np.split(counts, splits), np.concatenate([[0], splits])
+            ):
+                self.days[int(pair_days[start])].setdefault(metric, ValueCounts()).add(day_values, day_counts)
+
+
+class PopulationStats:
+    """
+    Cached per-day population statistics
+    - percentiles: percentiles reported for each metric
+    - histogram_bins: maximum number of histogram bins per metric
+    """
+
+    def __init__(self, percentiles=(5, 25, 50, 75, 95), histogram_bins=20):
+        self.percentiles = tuple(percentiles)
+        self.histogram_bins = histogram_bins
+        self._days = {}
+        self._lock = threading.Lock()
+        self._watermark = None
+        self._refreshed_at = None
+        self._full_refreshed_at = None
+        self._generation = 0
+        self._stats = {'refreshes': 0, 'full_refreshes': 0, 'days_rebuilt': 0, 'rows_scanned': 0}
+
+    @property
+    def watermark(self):
+        """updated_at up to which changes are reflected, or None before the first refresh"""
+        with self._lock:
+            return self._watermark
+
+    @property
+    def full_refreshed_at(self):
+        with self._lock:
+            return self._full_refreshed_at
+
+    @property
+    def generation(self):
+        """Incremented on every publish; use as a cache validator"""
+        with self._lock:
+            return self._generation
+
+    def summarize(self, day, counts, readings):
+        metrics = {}
+        for metric in READING_METRICS:
+            summary = counts[metric].summary(self.percentiles, self.histogram_bins) if metric in counts else None
+            if summary is not None:
+                metrics[metric] = summary
+        return {
+            'day': day_from_number(day).isoformat(),
+            'readings': readings,
+            'metrics': metrics
+        }
+
+    def publish(self, accumulator, watermark, days=None):
+        """
+        Replace days with the accumulator's results
+        days=None replaces every day (full refresh). Listed days missing from
+        the accumulator no longer have any readings and are dropped.
+        """
+        summaries = {
+            day: self.summarize(day, counts, accumulator.readings[day]) for day, counts in accumulator.days.items()
+        }
+        with self._lock:
+            if days is None:
+                self._days = summaries
+                self._full_refreshed_at = datetime.now(timezone.utc)
+                self._stats['full_refreshes'] += 1
+            else:
+                for day in days:
+                    if day in summaries:
+                        self._days[day] = summaries[day]
+                    else:
+                        self._days.pop(day, None)
+            self._watermark = watermark
+            self._refreshed_at = datetime.now(timezone.utc)
+            self._generation += 1
+            self._stats['refreshes'] += 1
+            self._stats['days_rebuilt'] += len(summaries)
+            self._stats['rows_scanned'] += accumulator.rows
+
+    def get(self, start=None, end=None, metrics=None):
+        """
+        Cached statistics for days in [start, end] (dates, inclusive), oldest
+        first, optionally limited to some metrics. None before the first refresh.
+        """
+        with self._lock:
+            if self._refreshed_at is None:
+                return None
+            days = sorted(self._days.items())
+            snapshot = {
+                'generation': self._generation,
+                'refreshed_at': self._refreshed_at.isoformat(),
+                'watermark': self._watermark.isoformat()
+            }
+
+        first = start.toordinal() - _EPOCH_ORDINAL if start else None
+        last = end.toordinal() - _EPOCH_ORDINAL if end else None
+        snapshot['days'] = []
+        for day, summary in days:
+            if (first is not None and day < first) or (last is not None and day > last):
+                continue
+            if metrics:
+                summary = dict(summary, metrics={k: v for k, v in summary['metrics'].items() if k in metrics})
+            snapshot['days'].append(summary)
+        return snapshot
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats['days'] = len(self._days)
+            stats['generation'] = self._generation
+            stats['watermark'] = self._watermark.isoformat() if self._watermark else None
+            stats['refreshed_at'] = self._refreshed_at.isoformat() if self._refreshed_at else None
+            stats['full_refreshed_at'] = self._full_refreshed_at.isoformat() if self._full_refreshed_at else None
+        return stats
@@ -0,0 +1,142 @@
+"""
+Opt-in request profiling and Supabase slow-query log
+- StackSampler samples one thread's Python stack at a fixed interval and
+  aggregates it into collapsed stacks (flamegraph.pl / speedscope format)
+- ProfileStore keeps the most recent request profiles for download
+- SlowQueryLog records Supabase calls slower than a threshold
+"""
+
+import os
+import sys
+import threading
+import uuid
+from collections import Counter, deque
+from datetime import datetime, timezone
+
+
+class StackSampler:
+    """Samples the stack of a single thread until stopped"""
+
+    def __init__(self, thread_id, interval=0.005):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='stack-sampler', daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        return self.stacks
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            self.stacks[self._collapse(frame)] += 1
+            self.samples += 1
+
+    @staticmethod
+    def _collapse(frame):
+        parts = []
+        while frame is not None:
+            code = frame.f_code
+            parts.append(f'{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})')
+            frame = frame.f_back
+        return ';'.join(reversed(parts))
+
+
+class ProfileStore:
+    """Bounded store of finished request profiles"""
+
+    def __init__(self, keep=50):
+        self._profiles = deque(maxlen=keep)
+        self._lock = threading.Lock()
+
+    def add(self, sampler, method, path, endpoint, status, duration):
+        profile = {
+            'profile_id': uuid.uuid4().hex,
+            'method': method,
+            'path': path,
+            'endpoint': endpoint,
+            'status': status,
+            'duration_ms': round(duration * 1000, 3),
+            'interval_ms': sampler.interval * 1000,
+            'samples': sampler.samples,
+            'captured_at': datetime.now(timezone.utc).isoformat(),
+            'stacks': dict(sampler.stacks)
+        }
+        with self._lock:
+            self._profiles.append(profile)
+        return profile
+
+    def summaries(self):
+        """Profile summaries, newest first"""
+        with self._lock:
+            profiles = list(self._profiles)
+        return [{k: v for k, v in p.items() if k != 'stacks'} for p in reversed(profiles)]
+
+    def get(self, profile_id):
+        with self._lock:
+            for profile in self._profiles:
+                if profile['profile_id'] == profile_id:
+                    return profile
+        return None
+
+    @staticmethod
+    def collapsed(profile):
+        """Render a profile as collapsed stack lines: 'frame;frame;frame count'"""
+        lines = sorted(profile['stacks'].items(), key=lambda item: -item[1])
+        return ''.join(f'{stack} {count}\n' for stack, count in lines)
+
+
+# Filter values never written to the slow-query log
+REDACTED_COLUMNS = {'password'}
+
+
+class SlowQueryLog:
+    """Bounded log of Supabase calls that exceeded threshold seconds"""
+
+    def __init__(self, threshold=0.5, keep=200):
+        self.threshold = threshold
+        self._entries = deque(maxlen=keep)
+        self._lock = threading.Lock()
+        self._total = 0
+
+    def observe(self, builder, duration, endpoint=None, error=None):
+        """Record the call if it was slow; returns the entry or None"""
+        if duration < self.threshold:
+            return None
+
+        entry = {
+            'table': builder.path.lstrip('/'),
+            'method': builder.http_method.value,
+            'filters': [
+                f'{key}=<redacted>' if key in REDACTED_COLUMNS else f'{key}={value}'
+                for key, value in builder.params.multi_items()
+            ],
+            'duration_ms': round(duration * 1000, 3),
+            'endpoint': endpoint,
+            'error': str(error) if error is not None else None,
+            'at': datetime.now(timezone.utc).isoformat()
+        }
+        with self._lock:
+            self._entries.append(entry)
+            self._total += 1
+        return entry
+
+    def entries(self):
+        """Slow queries, newest first"""
+        with self._lock:
+            return list(reversed(self._entries))
+
+    def stats(self):
+        with self._lock:
+            return {'threshold_ms': self.threshold * 1000, 'total_slow': self._total, 'retained': len(self._entries)}
+
@@ -0,0 +1,251 @@
+"""
+Resilient call layer for Supabase queries
+Wraps query builders with per-call timeouts, a request deadline budget,
+jittered retries for idempotent reads, a circuit breaker and optional
+hedged duplicate reads.
+"""
+
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+import httpx
+from postgrest.exceptions import APIError
+
+
+class SupabaseUnavailable(Exception):
+    """Raised when Supabase cannot serve a call (breaker open or retries exhausted)"""
+
+
+class SupabaseTimeout(SupabaseUnavailable):
+    """Raised when a call does not finish within its timeout or deadline"""
+
+
+# Errors that indicate a degraded upstream rather than a bad query
+RETRYABLE_ERRORS = (httpx.TransportError, TimeoutError)
+
+
+def is_retryable(error):
+    """
+    True for transport errors, timeouts and gateway 5xx responses
+    postgrest-py reports a non-JSON error body (e.g. a 502/503 from the
+    gateway) as an APIError whose code is the integer HTTP status.
+    """
+    if isinstance(error, RETRYABLE_ERRORS):
+        return True
+    return isinstance(error, APIError) and isinstance(error.code, int) and error.code >= 500
+
+
+class Deadline:
+    """Time budget shared by every Supabase call made while serving one request"""
+
+    def __init__(self, budget):
+        self.budget = budget
+        self.expires_at = time.monotonic() + budget
+
+    def remaining(self):
+        return max(0.0, self.expires_at - time.monotonic())
+
+    @property
+    def expired(self):
+        return self.remaining() <= 0
+
+
+class CircuitBreaker:
+    """
+    Classic three-state breaker
+    - closed: calls flow, consecutive failures are counted
+    - open: calls fail fast until reset_timeout has elapsed
+    - half_open: a single trial call decides whether to close or re-open
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, failure_threshold=5, reset_timeout=30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = None
+        self._trial_in_flight = False
+        self._times_opened = 0
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._current_state()
+
+    def _current_state(self):
+        if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+            self._state = self.HALF_OPEN
+            self._trial_in_flight = False
+        return self._state
+
+    def allow(self):
+        """Return True if a call may proceed"""
+        with self._lock:
+            state = self._current_state()
+            if state == self.CLOSED:
+                return True
+            if state == self.HALF_OPEN and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self._state = self.CLOSED
+            self._failures = 0
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                if self._state != self.OPEN:
+                    self._times_opened += 1
+                self._state = self.OPEN
+                self._opened_at = time.monotonic()
+                self._trial_in_flight = False
+
+    def snapshot(self):
+        with self._lock:
+            state = self._current_state()
+            retry_in = None
+            if state == self.OPEN:
+                retry_in = round(max(0.0, self.reset_timeout - (time.monotonic() - self._opened_at)), 3)
+            return {
+                'state': state,
+                'consecutive_failures': self._failures,
+                'failure_threshold': self.failure_threshold,
+                'reset_timeout': self.reset_timeout,
+                'times_opened': self._times_opened,
+                'retry_in': retry_in
+            }
+
+
+class ResilientCaller:
+    """
+    Executes postgrest query builders on a worker pool so every call is
+    bounded by a timeout, and applies retries, hedging and the breaker.
+    """
+
+    def __init__(self, call_timeout=3.0, max_retries=2, backoff_base=0.1, backoff_cap=1.0,
+                 hedge_delay=None, breaker=None, max_workers=32):
+        self.call_timeout = call_timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self.hedge_delay = hedge_delay
+        self.breaker = breaker or CircuitBreaker()
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='supabase')
+        self._lock = threading.Lock()
+        self._stats = {
+            'calls': 0,
+            'successes': 0,
+            'failures': 0,
+            'retries': 0,
+            'timeouts': 0,
+            'short_circuited': 0,
+            'hedges_sent': 0,
+            'hedges_won': 0
+        }
+
+    def _count(self, key, amount=1):
+        with self._lock:
+            self._stats[key] += amount
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+        stats['breaker'] = self.breaker.snapshot()
+        stats['call_timeout'] = self.call_timeout
+        stats['max_retries'] = self.max_retries
+        stats['hedge_delay'] = self.hedge_delay
+        return stats
+
+    def execute(self, builder, idempotent=False, hedge=False, deadline=None):
+        """
+        Execute a query builder and return its response
+        - idempotent: allow jittered retries on transport errors and timeouts
+        - hedge: send a duplicate request if the first is slower than hedge_delay
+        - deadline: Deadline bounding the total time spent, retries included
+        """
+        self._count('calls')
+        attempt = 0
+
+        while True:
+            timeout = self.call_timeout
+            if deadline is not None:
+                timeout = min(timeout, deadline.remaining())
+            if timeout <= 0:
+                self._count('timeouts')
+                self._count('failures')
+                raise SupabaseTimeout('Request deadline exceeded before Supabase call')
+
+            if not self.breaker.allow():
+                self._count('short_circuited')
+                raise SupabaseUnavailable('Supabase is unavailable (circuit breaker open)')
+
+            try:
+                result = self._attempt(builder, timeout, hedge and idempotent)
+            except Exception as e:
+                if not is_retryable(e):
+                    # Query-level errors (bad filter, constraint violation) mean
+                    # the upstream is answering, so they don't trip the breaker
+                    self.breaker.record_success()
+                    self._count('failures')
+                    raise
+
+                self.breaker.record_failure()
+                if isinstance(e, TimeoutError):
+                    self._count('timeouts')
+
+                backoff = random.uniform(0, min(self.backoff_cap, self.backoff_base * (2 ** attempt)))
+                out_of_time = deadline is not None and backoff >= deadline.remaining()
+                if not idempotent or attempt >= self.max_retries or out_of_time:
+                    self._count('failures')
+                    if isinstance(e, TimeoutError):
+                        raise SupabaseTimeout(f'Supabase call timed out after {timeout:.2f}s') from e
+                    raise SupabaseUnavailable(f'Supabase call failed: {e}') from e
+
+                attempt += 1
+                self._count('retries')
+                time.sleep(backoff)
+                continue
+
+            self.breaker.record_success()
+            self._count('successes')
+            return result
+
+    def _attempt(self, builder, timeout, hedge):
+        started = time.monotonic()
+        futures = [self._pool.submit(builder.execute)]
+
+        if hedge and self.hedge_delay is not None and self.hedge_delay < timeout:
+            done, _ = wait(futures, timeout=self.hedge_delay)
+            if not done:
+                futures.append(self._pool.submit(builder.execute))
+                self._count('hedges_sent')
+
+        pending = set(futures)
+        error = None
+        while pending:
+            remaining = timeout - (time.monotonic() - started)
+            if remaining <= 0:
+                break
+            done, pending = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    if future is not futures[0]:
+                        self._count('hedges_won')
+                    return future.result()
+                error = future.exception()
+
+        if pending or error is None:
+            raise TimeoutError(f'Supabase call exceeded {timeout:.2f}s')
+        raise error
@@ -0,0 +1,158 @@
+"""
+Typed request schemas for the ingestion path
+Request bodies are decoded straight from bytes into msgspec structs, so
+parsing and type validation happen in a single pass.
+"""
+
+from datetime import datetime, timedelta
+from itertools import accumulate
+from typing import Annotated, List, Optional, Union
+
+import msgspec
+
+# Timestamps must carry a timezone so they map to timestamptz unambiguously
+Timestamp = Annotated[datetime, msgspec.Meta(tz=True)]
+
+# client_id and the metric columns are INT (int4) in the database
+INT4_MIN, INT4_MAX = -2 ** 31, 2 ** 31 - 1
+Int4 = Annotated[int, msgspec.Meta(ge=INT4_MIN, le=INT4_MAX)]
+
+# Metric columns of a reading, in table order
+READING_METRICS = ('avg_blink_rate', 'avg_temp', 'left_eye_redness', 'right_eye_redness')
+
+# Content-Type of the compact delta-encoded batch format
+DELTA_BATCH_MEDIA_TYPE = 'application/vnd.visioncare.delta+json'
+
+# Longest gap allowed between consecutive readings of a delta batch
+MAX_TIME_DELTA_MS = 366 * 24 * 3600 * 1000
+
+
+class Reading(msgspec.Struct):
+    """
+    One sensor reading as posted to POST /data (mirrors the data table)
+    created_at is optional and defaults to the database's now().
+    """
+    client_id: Int4
+    avg_blink_rate: Int4
+    avg_temp: Int4
+    left_eye_redness: Int4
+    right_eye_redness: Int4
+    created_at: Optional[Timestamp] = None
+
+
+class DeltaBatch(msgspec.Struct):
+    """
+    Compact batch of one client's readings
+    Each metric array holds the first value as is and every later value as
+    the difference from the previous reading. time_deltas_ms holds each
+    reading's offset from the previous one (the first from base_timestamp).
+    """
+    client_id: Int4
+    base_timestamp: Timestamp
+    time_deltas_ms: List[Annotated[int, msgspec.Meta(ge=0, le=MAX_TIME_DELTA_MS)]]
+    avg_blink_rate: List[Int4]
+    avg_temp: List[Int4]
+    left_eye_redness: List[Int4]
+    right_eye_redness: List[Int4]
+
+
+class InvalidPayload(ValueError):
+    """Raised when a request body cannot be decoded into the expected schema"""
+
+
+class BatchTooLarge(InvalidPayload):
+    """Raised when a body holds more readings than the caller allows"""
+
+
+# A body is either a single reading object or an array of readings
+_readings_decoder = msgspec.json.Decoder(Union[Reading, List[Reading]])
+_delta_batch_decoder = msgspec.json.Decoder(DeltaBatch)
+
+
+def decode_readings(body, max_readings=None):
+    """
+    Decode a JSON request body into a list of Reading structs
+    Raises InvalidPayload with the offending path, e.g.
+    "Expected `int`, got `str` - at `$[3].avg_temp`", and BatchTooLarge
+    for more than max_readings readings.
+    """
+    if not body:
+        raise InvalidPayload('Request body is empty')
+
+    try:
+        decoded = _readings_decoder.decode(body)
+    except msgspec.DecodeError as e:
+        # ValidationError is a DecodeError subclass and carries the field path
+        raise InvalidPayload(str(e)) from e
+
+    readings = decoded if isinstance(decoded, list) else [decoded]
+    if not readings:
+        raise InvalidPayload('No readings provided')
+    if max_readings is not None and len(readings) > max_readings:
+        raise BatchTooLarge(f'Batch exceeds {max_readings} readings')
+    return readings
+
+
+def decode_delta_batch(body, max_readings=None):
+    """
+    Decode a delta-encoded batch body and expand it into Reading structs
+    Raises InvalidPayload on malformed input or mismatched array lengths,
+    and BatchTooLarge (before expanding) for more than max_readings readings.
+    """
+    if not body:
+        raise InvalidPayload('Request body is empty')
+
+    try:
+        batch = _delta_batch_decoder.decode(body)
+    except msgspec.DecodeError as e:
+        raise InvalidPayload(str(e)) from e
+
+    count = len(batch.time_deltas_ms)
+    if not count:
+        raise InvalidPayload('No readings provided')
+    if max_readings is not None and count > max_readings:
+        raise BatchTooLarge(f'Batch exceeds {max_readings} readings')
+    for name in READING_METRICS:
+        length = len(getattr(batch, name))
+        if length != count:
+            raise InvalidPayload(f'Expected {count} values, got {length} - at `$.{name}`')
+
+    offsets = accumulate(batch.time_deltas_ms)
+    columns = []
+    for name in READING_METRICS:
+        # Running sums of in-range deltas can still leave the int4 range
+        values = list(accumulate(getattr(batch, name)))
+        for index, value in enumerate(values):
+            if not INT4_MIN <= value <= INT4_MAX:
+                raise InvalidPayload(f'Expected `int` in int4 range, got {value} - at `$.{name}[{index}]`')
+        columns.append(values)
+    try:
+        return [
+            Reading(
+                batch.client_id,
+                blink_rate,
+                temp,
+                left_redness,
+                right_redness,
+                batch.base_timestamp + timedelta(milliseconds=offset)
+            )
+            for offset, blink_rate, temp, left_redness, right_redness in zip(offsets, *columns)
+        ]
+    except (OverflowError, ValueError) as e:
+        # Timestamps past datetime's range (year 9999)
+        raise InvalidPayload(f'Timestamp out of range: {e} - at `$.time_deltas_ms`') from e
+
+
+def reading_row(reading, row_id):
+    """Build the data table row for a decoded reading"""
+    row = {
+        "id": row_id,
+        "client_id": reading.client_id,
+        "avg_blink_rate": reading.avg_blink_rate,
+        "avg_temp": reading.avg_temp,
+        "left_eye_redness": reading.left_eye_redness,
+        "right_eye_redness": reading.right_eye_redness
+    }
+    if reading.created_at is not None:
+        row["created_at"] = reading.created_at.isoformat()
+    return row
@@ -0,0 +1,70 @@
+"""
+Single-flight request coalescing
+While a call for a key is in flight, concurrent callers with the same key
+wait for its result instead of starting their own.
+"""
+
+import threading
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.followers = 0
+
+
+class SingleFlight:
+    """Coalesces concurrent calls that share a key into one execution"""
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+        self._stats = {'leaders': 0, 'followers': 0, 'follower_timeouts': 0}
+
+    def do(self, key, fn, timeout=None):
+        """
+        Run fn() once per key at a time and return (result, shared)
+        - shared is True when the result was produced by another caller
+        - errors raised by the leader are re-raised in every follower
+        - followers raise TimeoutError if the leader takes longer than timeout
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            if call is None:
+                call = _Call()
+                self._calls[key] = call
+                self._stats['leaders'] += 1
+                leader = True
+            else:
+                call.followers += 1
+                self._stats['followers'] += 1
+                leader = False
+
+        if not leader:
+            if not call.done.wait(timeout):
+                with self._lock:
+                    self._stats['follower_timeouts'] += 1
+                raise TimeoutError('Timed out waiting for an identical in-flight request')
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = fn()
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+        return call.result, False
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats['in_flight'] = len(self._calls)
+        return stats
@@ -1,15 +1,21 @@
 """
 Test script for Flask Supabase API
-Tests all endpoints: health, login, data insert, and get data
+Tests all endpoints: health, login, data insert, get data, delta sync,
+jobs and population statistics
 """
 
+import os
 import requests
 import json
+import time
 from datetime import datetime
 
 # Base URL for the API
 BASE_URL = "http://localhost:5000"
 
+# Admin-only tests are skipped unless the server's ADMIN_TOKEN is exported
+ADMIN_TOKEN = os.environ.get('ADMIN_TOKEN')
+
 # Color codes for terminal output
 GREEN = '\033[92m'
 RED = '\033[91m'
@@ -429,7 +435,195 @@ def test_get_data_invalid_range():
         return False
 
 
-# Test 14: 404 Error
+# Test 14: Delta Sync - Changes Since Cursor
+def test_get_data_since():
+    print_test_header("Get Data Endpoint - Delta Sync")
+    
+    _, _, user_id = create_test_user()
+    if not user_id:
+        print_error("Cannot test - test user not available")
+        return False
+    
+    try:
+        response = requests.get(f"{BASE_URL}/data/{user_id}?range=day")
+        cursor = response.json().get('cursor')
+        if response.status_code != 200 or not cursor:
+            print_error(f"Expected a cursor from range=day, got status {response.status_code}")
+            return False
+        print_info(f"Cursor from range=day: {cursor}")
+        
+        insert = requests.post(f"{BASE_URL}/data", json={
+            "client_id": user_id,
+            "avg_blink_rate": 16,
+            "avg_temp": 36,
+            "left_eye_redness": 4,
+            "right_eye_redness": 4
+        })
+        new_id = insert.json()['data'][0]['id'] if insert.status_code == 201 else None
+        
+        response = requests.get(f"{BASE_URL}/data/{user_id}", params={"since": cursor})
+        print_response(response)
+        
+        if response.status_code != 200:
+            print_error(f"Delta sync failed with status code {response.status_code}")
+            return False
+        data = response.json()
+        if new_id is not None and new_id not in [row['id'] for row in data.get('data', [])]:
+            print_error(f"Row {new_id} inserted after the cursor is missing from the delta")
+            return False
+        if not data.get('cursor'):
+            print_error("Delta sync response has no next cursor")
+            return False
+        print_success(f"Delta sync returned {data.get('count', 0)} changes and a new cursor!")
+        return True
+    except Exception as e:
+        print_error(f"Delta sync test error: {str(e)}")
+        return False
+
+
+# Test 15: Delta Sync - Invalid and Expired Cursors
+def test_get_data_since_invalid():
+    print_test_header("Get Data Endpoint - Invalid and Expired Cursors")
+    
+    _, _, user_id = create_test_user()
+    if not user_id:
+        print_error("Cannot test - test user not available")
+        return False
+    
+    try:
+        response = requests.get(f"{BASE_URL}/data/{user_id}", params={"since": "yesterday"})
+        print_response(response)
+        if response.status_code != 400:
+            print_error(f"Expected 400 for a malformed cursor, got {response.status_code}")
+            return False
+        
+        response = requests.get(f"{BASE_URL}/data/{user_id}", params={"since": "2000-01-01T00:00:00Z"})
+        print_response(response)
+        if response.status_code != 410:
+            print_error(f"Expected 410 for an expired cursor, got {response.status_code}")
+            return False
+        
+        print_success("Malformed and expired cursors correctly rejected!")
+        return True
+    except Exception as e:
+        print_error(f"Delta sync test error: {str(e)}")
+        return False
+
+
+# Test 16: Jobs - Unknown Job and User
+def test_jobs_not_found():
+    print_test_header("Jobs Endpoint - Not Found")
+    
+    try:
+        response = requests.get(f"{BASE_URL}/jobs/0123456789abcdef")
+        print_response(response)
+        if response.status_code != 404:
+            print_error(f"Expected 404 for an unknown job, got {response.status_code}")
+            return False
+        
+        response = requests.delete(f"{BASE_URL}/users/987654321")
+        print_response(response)
+        if response.status_code != 404:
+            print_error(f"Expected 404 when deleting an unknown user, got {response.status_code}")
+            return False
+        
+        print_success("Unknown job and user correctly reported!")
+        return True
+    except Exception as e:
+        print_error(f"Jobs test error: {str(e)}")
+        return False
+
+
+# Test 17: Jobs - Poll a Background Job to Completion
+def test_job_polling():
+    print_test_header("Jobs Endpoint - Poll Population Stats Refresh")
+    
+    if not ADMIN_TOKEN:
+        print_info("ADMIN_TOKEN not set, skipping")
+        return None
+    
+    try:
+        response = requests.post(f"{BASE_URL}/stats/population/refresh", headers={"X-Admin-Token": ADMIN_TOKEN})
+        print_response(response)
+        if response.status_code != 202:
+            print_error(f"Expected 202, got {response.status_code}")
+            return False
+        
+        status_url = response.json()['status_url']
+        job = None
+        for _ in range(60):
+            job = requests.get(f"{BASE_URL}{status_url}").json()['job']
+            if job['status'] in ('completed', 'failed'):
+                break
+            time.sleep(1)
+        print_info(f"Job {job['job_id']}: {job['status']}, progress {job['progress']}")
+        
+        if job['status'] != 'completed':
+            print_error(f"Job did not complete: {job['status']} {job.get('error') or ''}")
+            return False
+        print_success("Background job completed and reported its progress!")
+        return True
+    except Exception as e:
+        print_error(f"Jobs test error: {str(e)}")
+        return False
+
+
+# Test 18: Population Statistics
+def test_population_stats():
+    print_test_header("Population Statistics Endpoint")
+    
+    try:
+        response = requests.get(f"{BASE_URL}/stats/population")
+        print_response(response)
+        
+        if response.status_code == 503:
+            if not response.headers.get('Retry-After'):
+                print_error("503 response is missing Retry-After")
+                return False
+            print_info("Statistics not materialized yet (503 with Retry-After)")
+            return None
+        if response.status_code != 200:
+            print_error(f"Expected 200 or 503, got {response.status_code}")
+            return False
+        
+        etag = response.headers.get('ETag')
+        cached = requests.get(f"{BASE_URL}/stats/population", headers={"If-None-Match": etag})
+        if cached.status_code != 304:
+            print_error(f"Expected 304 for a matching If-None-Match, got {cached.status_code}")
+            return False
+        
+        print_success(f"Retrieved statistics for {response.json().get('count', 0)} days; ETag revalidation works!")
+        return True
+    except Exception as e:
+        print_error(f"Population stats test error: {str(e)}")
+        return False
+
+
+# Test 19: Population Statistics - Invalid Parameters
+def test_population_stats_invalid():
+    print_test_header("Population Statistics Endpoint - Invalid Parameters")
+    
+    try:
+        for params in ({"metric": "heart_rate"}, {"start_date": "01/01/2025"}):
+            response = requests.get(f"{BASE_URL}/stats/population", params=params)
+            print_response(response)
+            if response.status_code != 400:
+                print_error(f"Expected 400 for {params}, got {response.status_code}")
+                return False
+        
+        response = requests.post(f"{BASE_URL}/stats/population/refresh")
+        if response.status_code != 403:
+            print_error(f"Expected 403 for a refresh without admin token, got {response.status_code}")
+            return False
+        
+        print_success("Invalid parameters and unauthenticated refresh correctly rejected!")
+        return True
+    except Exception as e:
+        print_error(f"Population stats test error: {str(e)}")
+        return False
+
+
+# Test 20: 404 Error
 def test_404_error():
     print_test_header("404 Error Handler")
     try:
@@ -468,6 +662,12 @@ def run_all_tests():
         ("Get Data - Last Month", test_get_data_month),
         ("Get Data - Custom Range", test_get_data_custom_range),
         ("Get Data - Invalid Range", test_get_data_invalid_range),
+        ("Delta Sync - Changes Since Cursor", test_get_data_since),
+        ("Delta Sync - Invalid Cursors", test_get_data_since_invalid),
+        ("Jobs - Not Found", test_jobs_not_found),
+        ("Jobs - Poll Background Job", test_job_polling),
+        ("Population Stats", test_population_stats),
+        ("Population Stats - Invalid Parameters", test_population_stats_invalid),
         ("404 Error Handler", test_404_error),
     ]
     
@@ -0,0 +1,120 @@
+import gzip
+import io
+
+import pytest
+import zstandard
+
+from content_encoding import decode_body, PayloadTooLarge, UnsupportedEncoding, CorruptPayload
+
+LIMIT = 1 << 20
+
+
+def zstd_stream(data_size, chunk=1 << 20):
+    """zstd body of data_size zero bytes without a declared content size"""
+    out = io.BytesIO()
+    with zstandard.ZstdCompressor().stream_writer(out, closefd=False) as writer:
+        for _ in range(data_size // chunk):
+            writer.write(bytes(chunk))
+    return out.getvalue()
+
+
+def test_identity_passes_through_within_limit():
+    assert decode_body(b'{"a": 1}', None, LIMIT) == b'{"a": 1}'
+    with pytest.raises(PayloadTooLarge):
+        decode_body(b'x' * (LIMIT + 1), 'identity', LIMIT)
+
+
+def test_unsupported_encoding():
+    with pytest.raises(UnsupportedEncoding):
+        decode_body(b'x', 'br', LIMIT)
+
+
+def test_zstd_roundtrip_across_frames():
+    compressor = zstandard.ZstdCompressor()
+    body = compressor.compress(b'[1,') + compressor.compress(b'2]')
+    assert decode_body(body, 'zstd', LIMIT) == b'[1,2]'
+
+
+def test_zstd_declared_size_rejected_up_front():
+    body = zstandard.ZstdCompressor().compress(bytes(64 * LIMIT))
+    assert len(body) < 16 * 1024
+    with pytest.raises(PayloadTooLarge):
+        decode_body(body, 'zstd', LIMIT)
+
+
+def test_zstd_streamed_bomb_is_capped_without_expanding():
+    import tracemalloc
+
+    body = zstd_stream(128 * LIMIT)
+    assert len(body) < 32 * 1024
+    tracemalloc.start()
+    try:
+        with pytest.raises(PayloadTooLarge):
+            decode_body(body, 'zstd', LIMIT)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    assert peak < 4 * LIMIT
+
+
+def test_zstd_truncated_and_corrupt():
+    body = zstandard.ZstdCompressor().compress(b'{"a": 1}' * 10000)
+    with pytest.raises(CorruptPayload):
+        decode_body(body[:len(body) // 2], 'zstd', LIMIT)
+    with pytest.raises(CorruptPayload):
+        decode_body(b'not zstd', 'zstd', LIMIT)
+
+
+def test_post_zstd_bomb_returns_413(client):
+    body = zstd_stream(64 * LIMIT)
+    response = client.post(
+        '/data',
+        data=body,
+        headers={'Content-Encoding': 'zstd', 'Content-Type': 'application/json'}
+    )
+    assert response.status_code == 413
+    assert 'exceeds' in response.get_json()['error']
+
+
+def test_post_chunked_body_capped_before_decoding(client):
+    import app
+    # No Content-Length: Werkzeug must stop reading at MAX_CONTENT_LENGTH
+    response = client.post(
+        '/data',
+        input_stream=io.BytesIO(b' ' * (app.MAX_UPLOAD_BYTES + 1)),
+        headers={'Transfer-Encoding': 'chunked', 'Content-Type': 'application/json'},
+        environ_overrides={'wsgi.input_terminated': True}
+    )
+    assert response.status_code == 413
+    assert 'exceeds' in response.get_json()['error']
+
+
+def test_post_oversized_body_with_content_length(client):
+    import app
+    response = client.post('/data', data=b' ' * (app.MAX_UPLOAD_BYTES + 1), content_type='application/json')
+    assert response.status_code == 413
+
+
+def test_gzip_concatenated_members():
+    body = gzip.compress(b'[1,') + gzip.compress(b'2]')
+    assert decode_body(body, 'gzip', LIMIT) == b'[1,2]'
+
+
+def test_gzip_cap_applies_across_members():
+    body = gzip.compress(b'a' * 600) + gzip.compress(b'b' * 600)
+    with pytest.raises(PayloadTooLarge):
+        decode_body(body, 'gzip', 1000)
+
+
+def test_gzip_bomb_is_capped():
+    body = gzip.compress(bytes(64 * LIMIT))
+    with pytest.raises(PayloadTooLarge):
+        decode_body(body, 'gzip', LIMIT)
+
+
+def test_gzip_trailing_garbage_and_truncation():
+    body = gzip.compress(b'{"a": 1}' * 100)
+    with pytest.raises(CorruptPayload):
+        decode_body(body + b'junk', 'gzip', LIMIT)
+    with pytest.raises(CorruptPayload):
+        decode_body(body[:-5], 'gzip', LIMIT)
@@ -0,0 +1,60 @@
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+import pytest
+
+import app
+from app import format_cursor, next_cursor, parse_cursor
+
+NOW = datetime(2025, 11, 14, 10, 30, 0, 123456, tzinfo=timezone.utc)
+
+
+def test_format_cursor_is_url_safe_utc():
+    local = NOW.astimezone(timezone(timedelta(hours=2)))
+    assert format_cursor(local) == '2025-11-14T10:30:00.123456Z'
+    assert '+' not in format_cursor(local)
+
+
+def test_parse_cursor_round_trip_and_offsets():
+    assert parse_cursor(format_cursor(NOW)) == NOW
+    assert parse_cursor('2025-11-14T12:30:00.123456+02:00') == NOW
+    # Naive timestamps are taken as UTC
+    assert parse_cursor('2025-11-14T10:30:00.123456') == NOW
+    with pytest.raises(ValueError):
+        parse_cursor('yesterday')
+
+
+def test_next_cursor_holds_back_by_lag():
+    assert parse_cursor(next_cursor(NOW)) == NOW - app.DELTA_SYNC_LAG
+
+
+def test_next_cursor_never_moves_behind_since():
+    since = NOW - app.DELTA_SYNC_LAG / 2
+    assert parse_cursor(next_cursor(NOW, since)) == since
+    older = NOW - app.DELTA_SYNC_LAG * 2
+    assert parse_cursor(next_cursor(NOW, older)) == NOW - app.DELTA_SYNC_LAG
+
+
+@pytest.mark.parametrize('since, status', [
+    ('not-a-cursor', 400),
+    ('2099-01-01T00:00:00Z', 400),
+    ('2000-01-01T00:00:00Z', 410)
+])
+def test_rejected_cursors(client, since, status):
+    response = client.get('/data/1', query_string={'since': since})
+    assert response.status_code == status
+
+
+def test_since_returns_changes_and_next_cursor(client, monkeypatch):
+    rows = [{'id': 7, 'client_id': 1, 'updated_at': '2025-11-14T10:29:00+00:00'}]
+    tombstones = [{'id': 3, 'deleted_at': '2025-11-14T10:29:30+00:00'}]
+    results = iter([rows, tombstones])
+    monkeypatch.setattr(app, 'run_query', lambda builder, **kwargs: SimpleNamespace(data=next(results)))
+
+    since = format_cursor(datetime.now(timezone.utc) - timedelta(hours=1))
+    response = client.get('/data/1', query_string={'since': since})
+    body = response.get_json()
+    assert response.status_code == 200
+    assert body['since'] == since
+    assert body['data'] == rows and body['deleted'] == tombstones
+    assert since < body['cursor'] <= format_cursor(datetime.now(timezone.utc) - app.DELTA_SYNC_LAG)
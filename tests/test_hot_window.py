@@ -0,0 +1,96 @@
+from datetime import datetime, timedelta, timezone
+
+from hot_window import ClientWindow, HotWindow, to_micros
+
+BASE = datetime(2025, 1, 1, tzinfo=timezone.utc)
+
+
+def row(row_id, seconds=None):
+    created = (BASE + timedelta(seconds=row_id if seconds is None else seconds)).isoformat()
+    return {
+        'id': row_id, 'client_id': 1, 'created_at': created, 'updated_at': created,
+        'avg_blink_rate': 15, 'avg_temp': 36, 'left_eye_redness': 5, 'right_eye_redness': 4
+    }
+
+
+def ids(window, cutoff=0):
+    return [r['id'] for r in window.rows_since(cutoff)]
+
+
+def test_grows_from_initial_slots_to_capacity():
+    window = ClientWindow(1, capacity=200)
+    assert window.allocated == ClientWindow.INITIAL_SLOTS
+    for i in range(150):
+        assert window.append(row(i), 0)
+    assert window.allocated == 200
+    assert window.size == 150
+    assert ids(window) == list(range(149, -1, -1))
+
+
+def test_grow_preserves_order_after_wraparound():
+    window = ClientWindow(1, capacity=256)
+    for i in range(64):
+        window.append(row(i), 0)
+    # Prune the oldest ten, then refill so the ring wraps before growing
+    cutoff = to_micros(row(10)['created_at'])
+    for i in range(64, 74):
+        window.append(row(i), cutoff)
+    assert window.head == 10 and window.allocated == 64
+    window.append(row(74), cutoff)
+    assert window.allocated == 128 and window.head == 0
+    assert ids(window) == list(range(74, 9, -1))
+
+
+def test_overflow_at_capacity_evicts_oldest():
+    window = ClientWindow(1, capacity=4)
+    for i in range(4):
+        assert window.append(row(i), 0)
+    assert not window.append(row(4), 0)
+    assert window.size == 4
+    assert ids(window) == [4, 3, 2, 1]
+
+
+def test_backdated_row_outside_window_is_skipped():
+    window = ClientWindow(1, capacity=4)
+    assert window.append(row(1, seconds=-10), to_micros(BASE.isoformat()))
+    assert window.size == 0
+
+
+def test_remove_across_wraparound():
+    window = ClientWindow(1, capacity=4)
+    for i in range(6):
+        window.append(row(i), 0)
+    assert window.head != 0
+    window.remove(3)
+    window.remove(99)
+    assert ids(window) == [5, 4, 2]
+    window.append(row(6), 0)
+    assert ids(window) == [6, 5, 4, 2]
+
+
+def test_update_in_place():
+    window = ClientWindow(1, capacity=4)
+    window.append(row(1), 0)
+    window.update(dict(row(1), avg_temp=39))
+    assert window.rows_since(0)[0]['avg_temp'] == 39
+
+
+def test_hot_window_drops_client_on_overflow():
+    now = datetime.now(timezone.utc)
+    fresh = [dict(row(i), created_at=(now - timedelta(seconds=10 - i)).isoformat(), updated_at=None) for i in range(3)]
+    hot = HotWindow(capacity=3)
+    assert hot.load(1, fresh, hot.version(1))
+    rows, _ = hot.get(1)
+    assert [r['id'] for r in rows] == [2, 1, 0]
+
+    hot.record_insert([dict(row(3), created_at=now.isoformat(), updated_at=None)])
+    assert hot.get(1) is None
+    assert hot.stats()['overflows'] == 1
+
+
+def test_hot_window_rejects_load_after_concurrent_write():
+    hot = HotWindow(capacity=3)
+    version = hot.version(1)
+    hot.record_delete(1, 5)
+    assert not hot.load(1, [], version)
+    assert hot.stats()['warm_races'] == 1
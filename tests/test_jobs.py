@@ -0,0 +1,203 @@
+import threading
+import time
+from types import SimpleNamespace
+
+import httpx
+import pytest
+
+import app
+from jobs import Job, JobManager
+from resilience import ResilientCaller
+
+
+def wait_finished(job, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not job.finished and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert job.finished
+
+
+class FakeQuery:
+    """The subset of the postgrest builder used by delete_user and purge_user"""
+
+    def __init__(self, db, table):
+        self.db = db
+        self.table = table
+        self.action = 'select'
+        self.filters = []
+        self.count = None
+
+    def select(self, columns):
+        return self
+
+    def delete(self):
+        self.action = 'delete'
+        return self
+
+    def eq(self, column, value):
+        self.filters.append(lambda row: row[column] == value)
+        return self
+
+    def in_(self, column, values):
+        self.filters.append(lambda row: row[column] in values)
+        return self
+
+    def order(self, column):
+        return self
+
+    def limit(self, count):
+        self.count = count
+        return self
+
+    def execute(self):
+        self.db.calls.append((self.table, self.action, self.count))
+        self.db.before_execute(self)
+        rows = self.db.tables[self.table]
+        matched = [row for row in rows if all(f(row) for f in self.filters)]
+        if self.action == 'delete':
+            self.db.tables[self.table] = [row for row in rows if row not in matched]
+        return SimpleNamespace(data=matched[:self.count] if self.count else matched)
+
+
+class FakeSupabase:
+    def __init__(self, users, data):
+        self.tables = {'users': users, 'data': data}
+        self.calls = []
+        self.before_execute = lambda query: None
+
+    def table(self, name):
+        return FakeQuery(self, name)
+
+
+@pytest.fixture
+def fake_db(monkeypatch):
+    db = FakeSupabase(
+        users=[{'user_id': 1}, {'user_id': 2}],
+        data=[{'id': i, 'client_id': 1} for i in range(1, 6)] + [{'id': 6, 'client_id': 2}]
+    )
+    monkeypatch.setattr(app, 'supabase', db)
+    monkeypatch.setattr(app, 'jobs', JobManager(max_workers=1))
+    monkeypatch.setattr(app, 'background_db', ResilientCaller(backoff_base=0.001, backoff_cap=0.001))
+    monkeypatch.setattr(app, 'USER_DELETE_BATCH_SIZE', 2)
+    monkeypatch.setattr(app, 'USER_DELETE_THROTTLE', 0)
+    return db
+
+
+def test_job_lifecycle():
+    manager = JobManager(max_workers=1)
+    release = threading.Event()
+    blocker, _ = manager.submit('block', lambda job: release.wait(5))
+    job, created = manager.submit('work', lambda job: job.update(done=1), answer=42)
+    assert created and job.status == Job.PENDING
+    time.sleep(0.05)
+    assert blocker.status == Job.RUNNING and blocker.started_at is not None
+
+    release.set()
+    wait_finished(job)
+    assert job.status == Job.COMPLETED
+    assert job.to_dict()['progress'] == {'done': 1}
+    assert job.to_dict()['params'] == {'answer': 42}
+    assert manager.get(job.job_id) is job
+
+
+def test_failed_job_records_error():
+    manager = JobManager()
+
+    def fail(job):
+        raise RuntimeError('boom')
+
+    job, _ = manager.submit('fail', fail)
+    wait_finished(job)
+    assert job.status == Job.FAILED and job.error == 'boom'
+
+
+def test_key_dedupes_unfinished_jobs():
+    manager = JobManager()
+    release = threading.Event()
+    first, created = manager.submit('purge', lambda job: release.wait(5), key=('purge', 1))
+    second, created_again = manager.submit('purge', lambda job: None, key=('purge', 1))
+    assert created and not created_again and second is first
+
+    other, created_other = manager.submit('purge', lambda job: None, key=('purge', 2))
+    assert created_other and other is not first
+
+    release.set()
+    wait_finished(first)
+    third, created_third = manager.submit('purge', lambda job: None, key=('purge', 1))
+    assert created_third and third is not first
+
+
+def test_prune_keeps_recent_finished_and_all_unfinished():
+    manager = JobManager(max_workers=1, keep_finished=2)
+    finished = []
+    for _ in range(4):
+        job, _ = manager.submit('quick', lambda job: None)
+        wait_finished(job)
+        finished.append(job)
+
+    release = threading.Event()
+    running, _ = manager.submit('slow', lambda job: release.wait(5))
+    assert [manager.get(job.job_id) for job in finished] == [None, None, finished[2], finished[3]]
+    assert manager.get(running.job_id) is running
+    release.set()
+
+
+def test_delete_user_purges_in_batches(client, fake_db):
+    response = client.delete('/users/1')
+    assert response.status_code == 202
+    body = response.get_json()
+    assert body['status_url'] == f"/jobs/{body['job_id']}"
+
+    job = app.jobs.get(body['job_id'])
+    wait_finished(job)
+    status = client.get(body['status_url']).get_json()['job']
+    assert status['status'] == 'completed'
+    assert status['progress'] == {'data_rows_deleted': 5, 'batches': 3, 'user_deleted': True}
+
+    data_calls = [call for call in fake_db.calls if call[0] == 'data']
+    assert [action for _, action, _ in data_calls] == ['select', 'delete'] * 3
+    assert all(count == app.USER_DELETE_BATCH_SIZE for _, action, count in data_calls if action == 'select')
+    assert fake_db.calls[-1] == ('users', 'delete', None)
+    assert fake_db.tables['data'] == [{'id': 6, 'client_id': 2}]
+    assert fake_db.tables['users'] == [{'user_id': 2}]
+
+
+def test_second_delete_returns_running_job(client, fake_db):
+    started, release = threading.Event(), threading.Event()
+
+    def block_first_batch(query):
+        if query.table == 'data' and not started.is_set():
+            started.set()
+            release.wait(5)
+
+    fake_db.before_execute = block_first_batch
+    first = client.delete('/users/1').get_json()
+    assert started.wait(5)
+    second = client.delete('/users/1').get_json()
+    release.set()
+
+    assert second['job_id'] == first['job_id']
+    assert second['message'] == 'User deletion already in progress'
+    wait_finished(app.jobs.get(first['job_id']))
+
+
+def test_delete_user_job_fails_when_supabase_errors(client, fake_db):
+    def fail_deletes(query):
+        if query.action == 'delete':
+            raise httpx.ConnectError('connection refused')
+
+    fake_db.before_execute = fail_deletes
+    body = client.delete('/users/1').get_json()
+    job = app.jobs.get(body['job_id'])
+    wait_finished(job)
+
+    status = client.get(body['status_url']).get_json()['job']
+    assert status['status'] == 'failed'
+    assert 'connection refused' in status['error']
+    assert status['progress']['user_deleted'] is False
+    assert fake_db.tables['users'] == [{'user_id': 1}, {'user_id': 2}]
+
+
+def test_unknown_user_and_job(client, fake_db):
+    assert client.delete('/users/99').status_code == 404
+    assert client.get('/jobs/0123456789abcdef').status_code == 404
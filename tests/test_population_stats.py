@@ -0,0 +1,156 @@
+import random
+from datetime import date, datetime, timedelta, timezone
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+import app
+from jobs import Job
+from population_stats import PopulationAccumulator, PopulationStats, ValueCounts, day_number
+from schemas import READING_METRICS
+
+DAY = datetime(2025, 3, 1, tzinfo=timezone.utc)
+PERCENTILES = (5, 25, 50, 75, 95)
+
+
+def make_rows(count, days=3, seed=1, null_rate=0.1):
+    rng = random.Random(seed)
+    rows = []
+    for i in range(count):
+        row = {
+            'id': i + 1,
+            'created_at': (DAY + timedelta(seconds=rng.uniform(0, days * 86400))).isoformat(),
+            'avg_blink_rate': rng.randint(8, 25),
+            'avg_temp': rng.randint(34, 38),
+            'left_eye_redness': rng.randint(0, 10),
+            'right_eye_redness': rng.randint(-5, 1000)
+        }
+        for metric in READING_METRICS:
+            if rng.random() < null_rate:
+                row[metric] = None
+        rows.append(row)
+    return rows
+
+
+def published(rows, chunk=500):
+    accumulator = PopulationAccumulator()
+    for start in range(0, len(rows), chunk):
+        accumulator.add_rows(rows[start:start + chunk])
+    stats = PopulationStats(percentiles=PERCENTILES)
+    stats.publish(accumulator, DAY)
+    return stats
+
+
+def test_summary_matches_numpy():
+    rows = make_rows(3000)
+    snapshot = published(rows).get()
+    assert len(snapshot['days']) == 3
+
+    for summary in snapshot['days']:
+        day_rows = [row for row in rows if date.fromisoformat(row['created_at'][:10]).isoformat() == summary['day']]
+        assert summary['readings'] == len(day_rows)
+        for metric in READING_METRICS:
+            values = np.array([row[metric] for row in day_rows if row[metric] is not None])
+            stats = summary['metrics'][metric]
+            assert stats['count'] == len(values)
+            assert stats['mean'] == pytest.approx(values.mean(), abs=1e-4)
+            assert stats['std'] == pytest.approx(values.std(), abs=1e-4)
+            assert (stats['min'], stats['max']) == (values.min(), values.max())
+            for q in PERCENTILES:
+                assert stats['percentiles'][f'p{q}'] == pytest.approx(np.percentile(values, q), abs=1e-4)
+
+
+def test_histogram_bins_bounded_and_complete():
+    rows = make_rows(2000, days=1)
+    for metric, stats in published(rows).get()['days'][0]['metrics'].items():
+        histogram = stats['histogram']
+        assert 1 <= len(histogram['counts']) <= 20
+        assert len(histogram['bin_edges']) == len(histogram['counts']) + 1
+        assert sum(histogram['counts']) == stats['count']
+        assert histogram['bin_edges'][0] == stats['min'] and histogram['bin_edges'][-1] > stats['max']
+
+
+def test_single_distinct_value():
+    counts = ValueCounts()
+    counts.add(np.array([36]), np.array([7]))
+    summary = counts.summary(PERCENTILES, 20)
+    assert (summary['count'], summary['mean'], summary['std']) == (7, 36.0, 0.0)
+    assert set(summary['percentiles'].values()) == {36.0}
+    assert summary['histogram'] == {'bin_edges': [36, 37], 'counts': [7]}
+
+
+def test_all_null_metric_is_omitted():
+    rows = make_rows(50, days=1, null_rate=0)
+    for row in rows:
+        row['avg_temp'] = None
+    metrics = published(rows).get()['days'][0]['metrics']
+    assert 'avg_temp' not in metrics and 'avg_blink_rate' in metrics
+
+
+def test_incremental_publish_replaces_and_drops_days():
+    rows = make_rows(300, days=2, null_rate=0)
+    stats = published(rows)
+    first, second = [day_number(s['day'] + 'T00:00:00+00:00') for s in stats.get()['days']]
+
+    # The second day lost all its readings; the first day is rebuilt from fewer rows
+    remaining = [row for row in rows if day_number(row['created_at']) == first][:10]
+    accumulator = PopulationAccumulator()
+    accumulator.add_rows(remaining)
+    stats.publish(accumulator, DAY + timedelta(days=3), days={first, second})
+
+    days = stats.get()['days']
+    assert [d['readings'] for d in days] == [10]
+    assert stats.watermark == DAY + timedelta(days=3)
+    assert stats.stats()['full_refreshes'] == 1
+
+
+def fake_run_query(data, tombstones):
+    """run_query stand-in serving rows for scan_data and changed_days"""
+    def run_query(builder, **kwargs):
+        params = list(builder.params.multi_items())
+        if builder.path == '/data_tombstones':
+            offset = int(dict(params).get('offset', 0))
+            return SimpleNamespace(data=tombstones[offset:] if offset == 0 else [])
+        rows = data
+        for column, condition in params:
+            op, _, value = condition.partition('.')
+            if column == 'id' and op == 'gt':
+                rows = [row for row in rows if row['id'] > int(value)]
+            elif column == 'created_at' and op in ('gte', 'lt'):
+                bound = datetime.fromisoformat(value)
+                rows = [
+                    row for row in rows
+                    if (datetime.fromisoformat(row['created_at']) >= bound) == (op == 'gte')
+                ]
+        return SimpleNamespace(data=rows)
+    return run_query
+
+
+def test_tombstone_without_created_at_forces_full_refresh(monkeypatch):
+    rows = make_rows(200, days=2, null_rate=0)
+    monkeypatch.setattr(app, 'population_stats', PopulationStats())
+    monkeypatch.setattr(app, 'run_query', fake_run_query(rows, []))
+    monkeypatch.setattr(app, 'POPULATION_STATS_THROTTLE', 0)
+
+    first = Job('population_stats')
+    app.materialize_population_stats(first)
+    assert first.progress['mode'] == 'full'
+
+    # Incremental while every change can be placed on a day
+    tombstones = [{'created_at': rows[0]['created_at']}]
+    monkeypatch.setattr(app, 'run_query', fake_run_query(rows, tombstones))
+    since = app.population_stats.watermark
+    # The fake ignores the updated_at filter, so every row counts as changed
+    assert app.changed_days(Job('population_stats'), since) == {day_number(row['created_at']) for row in rows}
+    incremental = Job('population_stats')
+    app.materialize_population_stats(incremental)
+    assert incremental.progress['mode'] == 'incremental'
+
+    # A tombstone recorded before created_at was tracked cannot be placed
+    monkeypatch.setattr(app, 'run_query', fake_run_query(rows, tombstones + [{'created_at': None}]))
+    assert app.changed_days(Job('population_stats'), since) is None
+    full = Job('population_stats')
+    app.materialize_population_stats(full)
+    assert full.progress['mode'] == 'full'
+    assert app.population_stats.stats()['full_refreshes'] == 2
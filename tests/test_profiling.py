@@ -0,0 +1,82 @@
+import time
+import threading
+from types import SimpleNamespace
+
+import pytest
+from postgrest import SyncPostgrestClient
+
+from profiling import ProfileStore, SlowQueryLog, StackSampler
+
+
+def users_query():
+    return SyncPostgrestClient('http://127.0.0.1:9').from_('users').select('*')
+
+
+def fake_sampler(stacks):
+    return SimpleNamespace(interval=0.005, samples=sum(stacks.values()), stacks=stacks)
+
+
+def test_slow_query_threshold():
+    log = SlowQueryLog(threshold=0.5)
+    assert log.observe(users_query(), 0.499) is None
+    entry = log.observe(users_query(), 0.5, endpoint='login')
+    assert entry['table'] == 'users'
+    assert entry['method'] == 'GET'
+    assert entry['endpoint'] == 'login' and entry['duration_ms'] == 500.0
+    assert log.stats() == {'threshold_ms': 500.0, 'total_slow': 1, 'retained': 1}
+
+
+def test_slow_query_redacts_password():
+    log = SlowQueryLog(threshold=0)
+    entry = log.observe(users_query().eq('email', 'a@example.com').eq('password', 'hunter2'), 1.0)
+    assert 'email=eq.a@example.com' in entry['filters']
+    assert 'password=<redacted>' in entry['filters']
+    assert 'hunter2' not in str(entry)
+
+
+def test_slow_query_log_is_bounded_and_newest_first():
+    log = SlowQueryLog(threshold=0, keep=2)
+    for duration in (1, 2, 3):
+        log.observe(users_query(), duration, error=RuntimeError('boom') if duration == 3 else None)
+    entries = log.entries()
+    assert [e['duration_ms'] for e in entries] == [3000, 2000]
+    assert entries[0]['error'] == 'boom'
+    assert log.stats()['total_slow'] == 3
+
+
+def test_profile_store_keeps_newest():
+    store = ProfileStore(keep=2)
+    added = [store.add(fake_sampler({'a': 1}), 'GET', f'/p{i}', 'get_data', 200, 0.01) for i in range(3)]
+    summaries = store.summaries()
+    assert [s['path'] for s in summaries] == ['/p2', '/p1']
+    assert all('stacks' not in s for s in summaries)
+    assert store.get(added[0]['profile_id']) is None
+    assert store.get(added[2]['profile_id'])['stacks'] == {'a': 1}
+
+
+def test_collapsed_output_sorted_by_count():
+    store = ProfileStore()
+    profile = store.add(fake_sampler({'main;a': 2, 'main;b': 5}), 'GET', '/', 'health', 200, 0.01)
+    assert ProfileStore.collapsed(profile) == 'main;b 5\nmain;a 2\n'
+
+
+def test_stack_sampler_captures_running_thread():
+    sampler = StackSampler(threading.get_ident(), interval=0.001).start()
+    deadline = time.monotonic() + 0.05
+    while time.monotonic() < deadline:
+        pass
+    stacks = sampler.stop()
+    assert sampler.samples > 0
+    assert any('test_stack_sampler_captures_running_thread' in stack for stack in stacks)
+
+
+@pytest.mark.parametrize('path', ['/admin/profiles', '/admin/profiles/abc', '/admin/slow-queries'])
+def test_admin_endpoints_require_token(client, monkeypatch, path):
+    import app
+    monkeypatch.setattr(app, 'ADMIN_TOKEN', None)
+    assert client.get(path, headers={'X-Admin-Token': ''}).status_code == 403
+
+    monkeypatch.setattr(app, 'ADMIN_TOKEN', 'secret')
+    assert client.get(path).status_code == 403
+    assert client.get(path, headers={'X-Admin-Token': 'wrong'}).status_code == 403
+    assert client.get(path, headers={'X-Admin-Token': 'secret'}).status_code in (200, 404)
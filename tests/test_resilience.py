@@ -0,0 +1,151 @@
+import time
+
+import httpx
+import pytest
+from postgrest.exceptions import APIError
+
+from resilience import CircuitBreaker, Deadline, ResilientCaller, SupabaseTimeout, SupabaseUnavailable
+
+
+class FakeBuilder:
+    """Query builder stand-in: each execute() pops the next outcome"""
+
+    def __init__(self, *outcomes, delay=0):
+        self.outcomes = list(outcomes)
+        self.delay = delay
+        self.calls = 0
+
+    def execute(self):
+        self.calls += 1
+        if self.delay:
+            time.sleep(self.delay)
+        outcome = self.outcomes.pop(0) if len(self.outcomes) > 1 else self.outcomes[0]
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+
+def make_caller(**kwargs):
+    kwargs.setdefault('backoff_base', 0.001)
+    kwargs.setdefault('backoff_cap', 0.001)
+    return ResilientCaller(**kwargs)
+
+
+def test_breaker_opens_after_threshold_and_fails_fast():
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=60)
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.CLOSED and breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow()
+    snapshot = breaker.snapshot()
+    assert snapshot['times_opened'] == 1 and snapshot['retry_in'] > 0
+
+
+def test_breaker_success_resets_consecutive_failures():
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=60)
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_breaker_half_open_allows_one_trial():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.05)
+    breaker.record_failure()
+    time.sleep(0.06)
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert breaker.allow()
+    assert not breaker.allow()
+
+    # A failed trial re-opens, a successful one closes
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert breaker.snapshot()['times_opened'] == 2
+    time.sleep(0.06)
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED and breaker.allow()
+
+
+def test_idempotent_call_retried_until_success():
+    caller = make_caller(max_retries=2)
+    builder = FakeBuilder(httpx.ConnectError('reset'), httpx.ConnectError('reset'), 'rows')
+    assert caller.execute(builder, idempotent=True) == 'rows'
+    stats = caller.stats()
+    assert builder.calls == 3
+    assert (stats['calls'], stats['retries'], stats['successes'], stats['failures']) == (1, 2, 1, 0)
+
+
+def test_retries_exhausted():
+    caller = make_caller(max_retries=2)
+    builder = FakeBuilder(httpx.ConnectError('reset'))
+    with pytest.raises(SupabaseUnavailable):
+        caller.execute(builder, idempotent=True)
+    stats = caller.stats()
+    assert builder.calls == 3
+    assert (stats['retries'], stats['failures']) == (2, 1)
+
+
+def test_writes_are_not_retried():
+    caller = make_caller(max_retries=2)
+    builder = FakeBuilder(httpx.ConnectError('reset'))
+    with pytest.raises(SupabaseUnavailable):
+        caller.execute(builder)
+    assert builder.calls == 1
+    assert caller.stats()['retries'] == 0
+
+
+def test_query_errors_raised_as_is_without_tripping_breaker():
+    caller = make_caller(breaker=CircuitBreaker(failure_threshold=1))
+    error = APIError({'message': 'duplicate key', 'code': '23505', 'hint': None, 'details': None})
+    with pytest.raises(APIError):
+        caller.execute(FakeBuilder(error), idempotent=True)
+    assert caller.stats()['breaker']['state'] == CircuitBreaker.CLOSED
+    assert caller.stats()['retries'] == 0
+
+
+def test_gateway_errors_are_retried():
+    caller = make_caller(max_retries=1)
+    builder = FakeBuilder(APIError({'message': 'bad gateway', 'code': 502, 'hint': None, 'details': None}), 'rows')
+    assert caller.execute(builder, idempotent=True) == 'rows'
+    assert caller.stats()['retries'] == 1
+
+
+def test_open_breaker_short_circuits():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=60)
+    breaker.record_failure()
+    caller = make_caller(breaker=breaker)
+    builder = FakeBuilder('rows')
+    with pytest.raises(SupabaseUnavailable):
+        caller.execute(builder, idempotent=True)
+    assert builder.calls == 0
+    assert caller.stats()['short_circuited'] == 1
+
+
+def test_call_timeout():
+    caller = make_caller(call_timeout=0.05, max_retries=0)
+    with pytest.raises(SupabaseTimeout):
+        caller.execute(FakeBuilder('rows', delay=0.3), idempotent=True)
+    stats = caller.stats()
+    assert (stats['timeouts'], stats['failures']) == (1, 1)
+    assert stats['breaker']['consecutive_failures'] == 1
+
+
+def test_expired_deadline_skips_the_call():
+    caller = make_caller()
+    builder = FakeBuilder('rows')
+    with pytest.raises(SupabaseTimeout):
+        caller.execute(builder, idempotent=True, deadline=Deadline(0))
+    assert builder.calls == 0
+    assert caller.stats()['timeouts'] == 1
+
+
+def test_deadline_bounds_retries():
+    caller = make_caller(call_timeout=1.0, max_retries=10, backoff_base=0.05, backoff_cap=0.05)
+    builder = FakeBuilder('rows', delay=0.3)
+    started = time.monotonic()
+    with pytest.raises(SupabaseTimeout):
+        caller.execute(builder, idempotent=True, deadline=Deadline(0.2))
+    assert time.monotonic() - started < 0.5
+    assert builder.calls == 1
@@ -0,0 +1,113 @@
+import json
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from schemas import decode_readings, decode_delta_batch, reading_row, InvalidPayload, BatchTooLarge, DELTA_BATCH_MEDIA_TYPE
+
+READING = {'client_id': 1, 'avg_blink_rate': 15, 'avg_temp': 36, 'left_eye_redness': 5, 'right_eye_redness': 4}
+
+BATCH = {
+    'client_id': 7,
+    'base_timestamp': '2025-01-01T08:00:00Z',
+    'time_deltas_ms': [0, 1000, 1500],
+    'avg_blink_rate': [15, 1, -2],
+    'avg_temp': [36, 0, 1],
+    'left_eye_redness': [5, 0, 0],
+    'right_eye_redness': [4, 1, 1]
+}
+
+
+def encode(payload):
+    return json.dumps(payload).encode()
+
+
+def test_decode_single_and_array():
+    assert len(decode_readings(encode(READING))) == 1
+    assert len(decode_readings(encode([READING] * 3))) == 3
+
+
+def test_decode_reports_field_path():
+    with pytest.raises(InvalidPayload, match=r'\$\[1\]\.avg_temp'):
+        decode_readings(encode([READING, dict(READING, avg_temp='hot')]))
+
+
+def test_created_at_requires_timezone():
+    with pytest.raises(InvalidPayload):
+        decode_readings(encode(dict(READING, created_at='2025-01-01T00:00:00')))
+    row = reading_row(decode_readings(encode(dict(READING, created_at='2025-01-01T00:00:00Z')))[0], 5)
+    assert row['id'] == 5 and row['created_at'] == '2025-01-01T00:00:00+00:00'
+
+
+def test_delta_batch_expansion():
+    readings = decode_delta_batch(encode(BATCH))
+    base = datetime(2025, 1, 1, 8, tzinfo=timezone.utc)
+    assert [r.client_id for r in readings] == [7, 7, 7]
+    assert [r.avg_blink_rate for r in readings] == [15, 16, 14]
+    assert [r.avg_temp for r in readings] == [36, 36, 37]
+    assert [r.right_eye_redness for r in readings] == [4, 5, 6]
+    assert [r.created_at for r in readings] == [
+        base, base + timedelta(seconds=1), base + timedelta(seconds=2.5)
+    ]
+
+
+def test_delta_batch_length_mismatch():
+    with pytest.raises(InvalidPayload, match=r'Expected 3 values, got 2 - at `\$\.avg_temp`'):
+        decode_delta_batch(encode(dict(BATCH, avg_temp=[36, 0])))
+
+
+def test_delta_batch_rejects_negative_time_deltas_and_empty():
+    with pytest.raises(InvalidPayload):
+        decode_delta_batch(encode(dict(BATCH, time_deltas_ms=[0, -1, 5])))
+    empty = {key: [] if isinstance(value, list) else value for key, value in BATCH.items()}
+    with pytest.raises(InvalidPayload, match='No readings'):
+        decode_delta_batch(encode(empty))
+
+
+def test_batch_limit_checked_before_expansion(monkeypatch):
+    import schemas
+
+    def fail(*args, **kwargs):
+        raise AssertionError('expanded an oversized batch')
+
+    monkeypatch.setattr(schemas, 'accumulate', fail)
+    with pytest.raises(BatchTooLarge):
+        decode_delta_batch(encode(BATCH), max_readings=2)
+    with pytest.raises(BatchTooLarge):
+        decode_readings(encode([READING] * 3), max_readings=2)
+
+
+def test_delta_batch_rejects_oversized_time_delta():
+    with pytest.raises(InvalidPayload, match=r'time_deltas_ms'):
+        decode_delta_batch(encode(dict(BATCH, time_deltas_ms=[0, 10 ** 17, 0])))
+
+
+def test_delta_batch_timestamp_overflow():
+    with pytest.raises(InvalidPayload, match=r'out of range.*\$\.time_deltas_ms'):
+        decode_delta_batch(encode(dict(BATCH, base_timestamp='9999-12-31T23:59:59Z')))
+
+
+def test_post_delta_batch_overflow_returns_400(client):
+    response = client.post(
+        '/data',
+        data=encode(dict(BATCH, base_timestamp='9999-12-31T23:59:59Z')),
+        content_type=DELTA_BATCH_MEDIA_TYPE
+    )
+    assert response.status_code == 400
+    assert 'time_deltas_ms' in response.get_json()['error']
+
+
+def test_values_outside_int4_rejected():
+    with pytest.raises(InvalidPayload, match=r'\$\.right_eye_redness'):
+        decode_readings(encode(dict(READING, right_eye_redness=99999999999999)))
+    with pytest.raises(InvalidPayload, match=r'\$\.client_id'):
+        decode_readings(encode(dict(READING, client_id=2 ** 31)))
+    assert decode_readings(encode(dict(READING, avg_temp=2 ** 31 - 1)))[0].avg_temp == 2 ** 31 - 1
+
+
+def test_delta_batch_running_sum_outside_int4_rejected():
+    big = 2 ** 31 - 1
+    with pytest.raises(InvalidPayload, match=r'\$\.avg_temp\[1\]'):
+        decode_delta_batch(encode(dict(BATCH, avg_temp=[big, 1, 0])))
+    with pytest.raises(InvalidPayload, match=r'\$\.avg_temp\[0\]'):
+        decode_delta_batch(encode(dict(BATCH, avg_temp=[big + 1, 0, 0])))
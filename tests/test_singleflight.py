@@ -0,0 +1,98 @@
+import threading
+import time
+
+import pytest
+
+from singleflight import SingleFlight
+
+
+def start_leader(flight, key, fn):
+    """Run flight.do(key, fn) in a thread; returns (thread, outcome dict)"""
+    outcome = {}
+
+    def run():
+        try:
+            outcome['result'] = flight.do(key, fn)
+        except Exception as e:
+            outcome['error'] = e
+
+    thread = threading.Thread(target=run)
+    thread.start()
+    return thread, outcome
+
+
+def test_follower_shares_leader_result():
+    flight = SingleFlight()
+    started, release = threading.Event(), threading.Event()
+
+    def fn():
+        started.set()
+        release.wait(5)
+        return 'rows'
+
+    thread, outcome = start_leader(flight, 'k', fn)
+    started.wait(5)
+    follower = {}
+    follower_thread = threading.Thread(target=lambda: follower.update(result=flight.do('k', lambda: 'other')))
+    follower_thread.start()
+    while flight.stats()['followers'] < 1:
+        time.sleep(0.001)
+    release.set()
+    thread.join(5)
+    follower_thread.join(5)
+
+    assert outcome['result'] == ('rows', False)
+    assert follower['result'] == ('rows', True)
+    assert flight.stats() == {'leaders': 1, 'followers': 1, 'follower_timeouts': 0, 'in_flight': 0}
+
+
+def test_leader_error_fans_out_to_followers():
+    flight = SingleFlight()
+    started, release = threading.Event(), threading.Event()
+    error = RuntimeError('upstream failed')
+
+    def fn():
+        started.set()
+        release.wait(5)
+        raise error
+
+    thread, outcome = start_leader(flight, 'k', fn)
+    started.wait(5)
+    followers = [start_leader(flight, 'k', lambda: 'unused') for _ in range(3)]
+    while flight.stats()['followers'] < 3:
+        time.sleep(0.001)
+    release.set()
+    for follower_thread, _ in followers + [(thread, outcome)]:
+        follower_thread.join(5)
+
+    assert outcome['error'] is error
+    assert all(follower['error'] is error for _, follower in followers)
+
+    # The failed call is not cached; the next caller runs fn again
+    assert flight.do('k', lambda: 'fresh') == ('fresh', False)
+
+
+def test_follower_timeout():
+    flight = SingleFlight()
+    started, release = threading.Event(), threading.Event()
+
+    def fn():
+        started.set()
+        release.wait(5)
+        return 'rows'
+
+    thread, outcome = start_leader(flight, 'k', fn)
+    started.wait(5)
+    with pytest.raises(TimeoutError):
+        flight.do('k', lambda: 'unused', timeout=0.05)
+    assert flight.stats()['follower_timeouts'] == 1
+    release.set()
+    thread.join(5)
+    assert outcome['result'] == ('rows', False)
+
+
+def test_distinct_keys_do_not_coalesce():
+    flight = SingleFlight()
+    assert flight.do('a', lambda: 1) == (1, False)
+    assert flight.do('b', lambda: 2) == (2, False)
+    assert flight.stats()['leaders'] == 2